@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/2.0/ref/settings/
 
 import os
 
+from CowInfoWeb.databases import get_databases
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -43,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'cowapp.metrics.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,13 +80,30 @@ WSGI_APPLICATION = 'CowInfoWeb.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.0/ref/settings/#databases
 
-DATABASES = {
+DATABASES = get_databases(os.environ, default_sqlite=os.path.join(BASE_DIR, 'db.sqlite3'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.0/topics/cache/
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Name of the cache in CACHES used to cache the responses of the cow and record views.
+COWAPP_RESPONSE_CACHE = 'default'
+
+# Requests and queries slower than these, in milliseconds, are logged by the PerformanceMiddleware.
+COWAPP_SLOW_REQUEST_MS = 1000
+COWAPP_SLOW_QUERY_MS = 100
+
+# Broker waking the requests waiting for changes on /changes/. LocalBroker only sees the changes made in the same
+# process, so with several worker processes use 'cowapp.notifications.DatabaseBroker', which polls the database.
+# Waiting requests hold a worker thread, so serve them by threaded or asynchronous workers.
+COWAPP_CHANGE_BROKER = 'cowapp.notifications.LocalBroker'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.0/ref/settings/#auth-password-validators
@@ -129,6 +149,11 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static/")
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
-    )
+        'cowapp.authentication.CachingTokenAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'cowapp.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'cowapp.renderers.ColumnarJSONRenderer',
+    ),
 }
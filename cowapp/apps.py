@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class CowappConfig(AppConfig):
     name = 'cowapp'
+
+    def ready(self):
+        from cowapp import checks, database, notifications  # noqa: F401, registers the checks and receivers
+        from cowapp.filters import FilterSchema
+        for model_name in ('Cow', 'Record'):
+            FilterSchema.for_model(self.get_model(model_name))
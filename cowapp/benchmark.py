@@ -0,0 +1,48 @@
+import datetime
+import random
+
+from django.contrib.auth.models import User
+
+from cowapp.models import Cow, Record
+
+CONTENTS = ('백신 접종', '인공수정', '구충제', '임신 감정', '분만', '발정', '설사 치료', 'vaccine')
+
+
+def cow_number(user_index, cow_index):
+    return f'{user_index % 1000:03}-{cow_index // 10000 % 10000:04}-{cow_index % 10000:04}-{cow_index % 10}'
+
+
+def seed_farms(users, cows, records, prefix='bench', seed=0, depth=None):
+    """
+    Create 'users' users with 'cows' cows each and 'records' records per cow, and return the users.
+
+    About half of the cows have a mother among the cows registered before them, and some have no birthday.
+    If 'depth' is given, the cows form lineages of 'depth' generations instead,
+    each cow being the daughter of the cow registered right before it unless it starts a new lineage.
+    """
+    rand = random.Random(seed)
+    start = datetime.date(2010, 1, 1)
+    created = []
+    for user_index in range(users):
+        user = User.objects.create(username=f'{prefix}{user_index}')
+        numbers = []
+        herd = []
+        for cow_index in range(cows):
+            number = cow_number(user_index, cow_index)
+            birthday = start + datetime.timedelta(days=rand.randrange(3000)) if rand.random() < 0.9 else None
+            if depth:
+                mother_number = numbers[-1] if cow_index % depth else None
+            else:
+                mother_number = rand.choice(numbers) if numbers and rand.random() < 0.5 else None
+            herd.append(Cow(number=number, sex=rand.choice(('female', 'male')), birthday=birthday,
+                            mother_number=mother_number, user=user))
+            numbers.append(number)
+        Cow.objects.bulk_create(herd, batch_size=500)
+        history = []
+        for cow_id in Cow.objects.filter(user=user).values_list('id', flat=True):
+            for _ in range(records):
+                history.append(Record(cow_id=cow_id, content=rand.choice(CONTENTS), user=user,
+                                      day=start + datetime.timedelta(days=rand.randrange(3000))))
+        Record.objects.bulk_create(history, batch_size=500)
+        created.append(user)
+    return created
@@ -0,0 +1,36 @@
+from django.db import connections, router
+from django.db.models import Case, Value, When
+
+
+def bulk_create(model, objs, batch_size=500):
+    """
+    Insert 'objs' of 'model', stamped with the same 'user' and 'seq', in batches, setting their primary keys.
+
+    If the database cannot return the primary keys of bulk inserted rows, like SQLite,
+    they are read back by the 'seq', which no other row of the user has, in the order the rows were inserted.
+    The model signals are not sent.
+    """
+    if not objs:
+        return objs
+    connection = connections[router.db_for_write(model)]
+    model.objects.bulk_create(objs, batch_size=batch_size)
+    if not connection.features.can_return_ids_from_bulk_insert:
+        pks = model._base_manager.filter(user_id=objs[0].user_id, seq=objs[0].seq).order_by('pk')
+        for obj, pk in zip(objs, pks.values_list('pk', flat=True)):
+            obj.pk = pk
+    return objs
+
+
+def bulk_update(model, objs, fields, batch_size=500):
+    """
+    Update 'fields' of 'objs' of 'model' with a single UPDATE statement per batch, like 'QuerySet.bulk_update'
+    which is not available in this version of Django. The model signals are not sent.
+    """
+    fields = [model._meta.get_field(name) for name in fields]
+    for i in range(0, len(objs), batch_size):
+        batch = objs[i:i + batch_size]
+        updates = {}
+        for field in fields:
+            whens = [When(pk=obj.pk, then=Value(getattr(obj, field.attname), output_field=field)) for obj in batch]
+            updates[field.attname] = Case(*whens, output_field=field)
+        model._base_manager.filter(pk__in=[obj.pk for obj in batch]).update(**updates)
@@ -0,0 +1,91 @@
+import hashlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from cowapp.models import HerdVersion
+
+response_cache_stats = Counter(hits=0, misses=0)
+
+
+def get_cache():
+    return caches[getattr(settings, 'COWAPP_RESPONSE_CACHE', 'default')]
+
+
+def get_herd_version(view):
+    if not hasattr(view, 'herd_version'):
+        view.herd_version = HerdVersion.get(view.request.user.id)
+    return view.herd_version
+
+
+class ConditionalGetMixin:
+    """
+    Custom supporting mixin for APIViews to answer conditional GET requests based on the HerdVersion of the user.
+
+    The ETag is computed from the HerdVersion right after authentication,
+    so a request whose If-None-Match still matches is answered with 304 before any serialization is done.
+    As the ETag is the same for every URL of the user, 'check_object' is called before answering 304,
+    so that the objects of the other users and the objects which do not exist are still not found.
+    Last-Modified is not sent, as its resolution of a second would match If-Modified-Since after the changes
+    made in the same second.
+    """
+
+    def get(self, request, *args, **kwargs):
+        herd_version = get_herd_version(self)
+        etag = f'"{request.user.id}-{herd_version.version}-{request.accepted_renderer.format}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            self.check_object()
+        else:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+        return response
+
+    def check_object(self):
+        """
+        Raise NotFound if the URL looks up an object, by 'lookup_field', which is not among the objects of the user.
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            if not self.get_queryset().filter(**lookup).exists():
+                raise NotFound()
+
+
+class ResponseCacheMixin:
+    """
+    Custom supporting mixin for APIViews to cache the data of successful GET responses per user.
+
+    The cache key consists of the user, the HerdVersion of the user, the rendered format and the full URI,
+    so the signals increasing the HerdVersion on any save or delete of the cows and records of the user
+    invalidate exactly the responses of that user.
+    The cache used is the one named by 'COWAPP_RESPONSE_CACHE' in settings.
+    Streamed responses are not cached.
+    """
+    cache_timeout = 60 * 60
+
+    def get(self, request, *args, **kwargs):
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            response_cache_stats['hits'] += 1
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response_cache_stats['misses'] += 1
+        response = super().get(request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+            response['X-Cache'] = 'MISS'
+        return response
+
+    def get_cache_key(self, request):
+        uri = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        version = get_herd_version(self).version
+        return f'cowapp:response:{request.user.id}:{version}:{request.accepted_renderer.format}:{uri}'
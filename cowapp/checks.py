@@ -0,0 +1,64 @@
+"""
+Checks of the parts of the schema created by raw SQL in the migrations, which the model state does not know of.
+
+SQLite remakes a table to alter most of its columns, dropping the indexes and triggers created by raw SQL,
+so the unique numbers of the cows and the full-text index of the records would be lost without any error.
+These checks are tagged 'database', so they are run by 'manage.py check --tag database'.
+"""
+from importlib import import_module
+
+from django.core import checks
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+from cowapp.search import FTS_TABLE, FTS_TRIGGERS
+
+# Django of this version supports no partial index in the model state, so they are created by the migration 0010.
+soft_delete = import_module('cowapp.migrations.0010_soft_delete')
+
+
+def get_raw_schema_errors(connection):
+    """
+    Return the errors of the partial indexes on the cows and, on SQLite, of the triggers of the full-text index,
+    if the migrations creating them are applied to the database of 'connection'.
+    """
+    applied = MigrationRecorder(connection).applied_migrations()
+    errors = []
+    with connection.cursor() as cursor:
+        if ('cowapp', '0010_soft_delete') in applied:
+            constraints = connection.introspection.get_constraints(cursor, 'cowapp_cow')
+            for name, unique, columns in soft_delete.PARTIAL_INDEXES:
+                if name not in constraints:
+                    errors.append(checks.Error(
+                        f'The partial index {name} on cowapp_cow {columns} is missing.',
+                        hint='Create it again by create_partial_indexes of the migration 0010 in a new migration.',
+                        obj=connection.alias, id='cowapp.E001',
+                    ))
+        if ('cowapp', '0011_record_fts') in applied and connection.vendor == 'sqlite':
+            names = (FTS_TABLE,) + FTS_TRIGGERS
+            cursor.execute('SELECT name FROM sqlite_master WHERE name IN ({})'.format(', '.join(['%s'] * len(names))),
+                           names)
+            names = {name for name, in cursor.fetchall()}
+            missing = [name for name in FTS_TRIGGERS if name not in names]
+            if FTS_TABLE not in names:
+                errors.append(checks.Warning(
+                    f'The full-text index {FTS_TABLE} is missing, so the records are searched with LIKE.',
+                    hint='SQLite needs FTS5 and the trigram tokenizer(3.34+) for the migration 0011 to create it.',
+                    obj=connection.alias, id='cowapp.W001',
+                ))
+            elif missing:
+                errors.append(checks.Error(
+                    f'The triggers {", ".join(missing)} of the full-text index {FTS_TABLE} are missing.',
+                    hint='Create the full-text index again by create_fts of the migration 0011 in a new migration.',
+                    obj=connection.alias, id='cowapp.E002',
+                ))
+    return errors
+
+
+@checks.register(checks.Tags.database)
+def check_raw_schema(app_configs=None, **kwargs):
+    errors = []
+    for connection in connections.all():
+        if 'cowapp_cow' in connection.introspection.table_names():
+            errors.extend(get_raw_schema_errors(connection))
+    return errors
@@ -0,0 +1,28 @@
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection=None, **kwargs):
+    """
+    Apply the 'PRAGMAS' of the settings of SQLite connections, in order, when they are opened.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in connection.settings_dict.get('PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    """
+    Close the persistent connections with 'HEALTH_CHECKS' in their settings that are no longer usable,
+    so that a request after a restart of the database server reconnects instead of failing.
+    """
+    for connection in connections.all():
+        if connection.connection is not None and connection.settings_dict.get('HEALTH_CHECKS') and \
+                not connection.in_atomic_block and not connection.is_usable():
+            connection.close()
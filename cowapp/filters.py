@@ -0,0 +1,130 @@
+import re
+from functools import lru_cache
+
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, Field
+from django.db.models.constants import LOOKUP_SEP
+
+
+class FilterSchema:
+    """
+    Compiled schema of the query_params valid for filtering and ordering the queryset of a model.
+
+    The concrete fields of the model, and of the models related by foreign keys or reverse relations(e.g. 'records')
+    up to 'depth', are introspected once.
+    A key of the query_params is valid if it is a path of those fields followed by
+    transforms(e.g. 'year') and a lookup(e.g. 'gte') registered on the field.
+    A reverse relation by itself filters by the primary key of the related objects. Filtering across reverse relations
+    returns each object once, and ordering by them is not allowed as it would repeat the objects.
+    Fields named in 'exclude' are not exposed at all.
+    The plan compiled for each signature of query_params is cached in an LRU of 'maxsize'.
+    """
+
+    def __init__(self, model, exclude=('user',), depth=1, maxsize=256):
+        self.model = model
+        self.fields = {'pk': model._meta.pk}
+        self.multivalued = set()
+        self.collect_fields(model, '', exclude, depth)
+        self.compile = lru_cache(maxsize=maxsize)(self.compile_plan)
+        self.resolve = lru_cache(maxsize=maxsize)(self.resolve_key)
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def for_model(cls, model):
+        return cls(model)
+
+    def collect_fields(self, model, prefix, exclude, depth):
+        for field in model._meta.get_fields():
+            if field.concrete:
+                name, target = field.name, field
+            elif field.auto_created and field.is_relation and not field.hidden:
+                name, target = field.field.related_query_name(), field.target_field
+                if name not in exclude:
+                    self.multivalued.add(prefix + name)
+            else:
+                continue
+            if name in exclude:
+                continue
+            self.fields[prefix + name] = target
+            if field.is_relation and depth > 0:
+                self.collect_fields(field.related_model, prefix + name + LOOKUP_SEP, exclude, depth - 1)
+
+    def compile_plan(self, keys):
+        """
+        Return the dict mapping each valid key of 'keys' to the function preparing its value.
+        """
+        plan = {}
+        for key in keys:
+            prepare = self.resolve(key)
+            if prepare is not None:
+                plan[key] = prepare
+        return plan
+
+    def resolve_key(self, key):
+        parts = key.split(LOOKUP_SEP)
+        for i in range(len(parts), 0, -1):
+            field = self.fields.get(LOOKUP_SEP.join(parts[:i]))
+            if field is not None:
+                break
+        else:
+            return None
+        names = parts[i:] or ['exact']
+        lookup = 'exact'
+        for j, name in enumerate(names):
+            if j == len(names) - 1 and field.get_lookup(name) is not None:
+                lookup = name
+                break
+            transform = field.get_transform(name)
+            if transform is None:
+                return None
+            if isinstance(getattr(transform, 'output_field', None), Field):
+                field = transform.output_field
+        if field.is_relation:
+            field = field.target_field
+        return self.get_prepare(field, lookup)
+
+    @staticmethod
+    def get_prepare(field, lookup):
+        if lookup == 'isnull':
+            return BooleanField().to_python
+        if lookup in ('in', 'range'):
+            def prepare(value):
+                values = [field.to_python(item) for item in value.split(',')]
+                if lookup == 'range' and len(values) != 2:
+                    raise ValueError(value)
+                return values
+            return prepare
+        if lookup in ('regex', 'iregex'):
+            def prepare(value):
+                try:
+                    re.compile(value)
+                except re.error:
+                    raise ValueError(value)
+                return value
+            return prepare
+        return field.to_python
+
+    def filter(self, queryset, params):
+        """
+        Return the queryset filtered by the valid keys of 'params', ignoring the keys or values not valid.
+        """
+        options = {}
+        for key, prepare in self.compile(tuple(params)).items():
+            try:
+                options[key] = prepare(params[key])
+            except (ValueError, TypeError, ValidationError):
+                pass
+        queryset = queryset.filter(**options)
+        if any(self.is_multivalued(key) for key in options):
+            queryset = queryset.distinct()
+        return queryset
+
+    def is_multivalued(self, key):
+        parts = key.split(LOOKUP_SEP)
+        return any(LOOKUP_SEP.join(parts[:i]) in self.multivalued for i in range(1, len(parts) + 1))
+
+    def is_orderable(self, value):
+        if not value:
+            return False
+        value = value[value[0] == '-':]
+        return value in self.fields and not self.is_multivalued(value)
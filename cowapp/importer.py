@@ -0,0 +1,126 @@
+import csv
+from collections import OrderedDict
+from itertools import islice
+
+from django.db import transaction
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
+
+from cowapp.models import Cow, Record, HerdVersion
+from cowapp.notifications import publish_change
+from cowapp.serializers import validate_cow_number
+
+COLUMNS = OrderedDict([
+    ('cows', ('number', 'sex', 'birthday', 'mother_number')),
+    ('records', ('number', 'day', 'content', 'etc')),
+])
+
+
+class HerdImporter:
+    """
+    Importer of the cows or the records of a user from CSV, whose header names the columns in COLUMNS.
+
+    The rows are parsed as they are read and inserted 'batch_size' at a time by 'bulk_create', each batch in its own
+    transaction stamped with the next HerdVersion of the user, so memory is bounded by the batch
+    and a failed import can be resumed from the number of rows it reported, given as 'start'.
+    Invalid rows are skipped and reported with their line numbers, the first 'max_errors' of them.
+    After the cows are imported, the mother numbers which are not the number of any cow of the user are reported.
+    'progress' is called with the summary in the transaction of each batch, so a checkpoint saved by it in the
+    database is committed with the batch. If the import fails, 'summary' counts the rows of the committed batches.
+    """
+    max_errors = 100
+
+    def __init__(self, user, kind, batch_size=1000, progress=None):
+        if kind not in COLUMNS:
+            raise ValueError(f'Unknown kind: {kind}')
+        self.user = user
+        self.kind = kind
+        self.batch_size = batch_size
+        self.progress = progress
+
+    def run(self, lines, start=0):
+        self.summary = OrderedDict([('rows', start), ('created', 0), ('skipped', 0), ('errors', [])])
+        reader = csv.DictReader(lines)
+        missing = [column for column in COLUMNS[self.kind] if column not in (reader.fieldnames or ())]
+        if missing:
+            raise serializers.ValidationError(f'CSV 에 {", ".join(missing)} 열이 없습니다.')
+        if self.kind == 'cows':
+            self.numbers = set(Cow.objects.filter(user=self.user).values_list('number', flat=True))
+        else:
+            self.cows = dict(Cow.objects.filter(user=self.user).values_list('number', 'id'))
+
+        rows = ((reader.line_num, row) for row in islice(reader, start, None))
+        for batch in iter(lambda: list(islice(rows, self.batch_size)), []):
+            # The summary is replaced once the batch is committed, so it counts only the rows committed.
+            summary = OrderedDict(self.summary, errors=list(self.summary['errors']))
+            objs = []
+            for line, row in batch:
+                try:
+                    objs.append(self.parse(row))
+                except serializers.ValidationError as e:
+                    summary['skipped'] += 1
+                    if len(summary['errors']) < self.max_errors:
+                        summary['errors'].append(OrderedDict([('line', line), ('error', str(e.detail[0]))]))
+            summary['rows'] += len(batch)
+            summary['created'] += len(objs)
+            with transaction.atomic():
+                self.save(objs)
+                if self.progress:
+                    self.progress(summary)
+            self.summary = summary
+
+        if self.kind == 'cows':
+            numbers = Cow.objects.filter(user=self.user).values('number')
+            unresolved = Cow.objects.filter(user=self.user, mother_number__isnull=False) \
+                .exclude(mother_number__in=numbers).values_list('mother_number', flat=True).distinct()
+            self.summary['unresolved_mothers'] = sorted(unresolved)
+        return self.summary
+
+    def save(self, objs):
+        if not objs:
+            return
+        model = Cow if self.kind == 'cows' else Record
+        seq = HerdVersion.next(self.user.id)
+        for obj in objs:
+            obj.seq = seq
+        model.objects.bulk_create(objs, batch_size=self.batch_size)
+        publish_change(self.user.id)
+
+    def parse(self, row):
+        row = {key: (value or '').strip() for key, value in row.items() if key}
+        if self.kind == 'cows':
+            return self.parse_cow(row)
+        return self.parse_record(row)
+
+    def parse_cow(self, row):
+        number = validate_cow_number(row['number'])
+        if number in self.numbers:
+            raise serializers.ValidationError('이 번호를 가진 개체가 이미 있습니다.')
+        if row['sex'] not in ('female', 'male'):
+            raise serializers.ValidationError('성별은 female 또는 male 이어야 합니다.')
+        mother_number = validate_cow_number(row['mother_number']) if row['mother_number'] else None
+        cow = Cow(number=number, sex=row['sex'], birthday=self.parse_date(row['birthday'], required=False),
+                  mother_number=mother_number, user=self.user)
+        self.numbers.add(number)
+        return cow
+
+    def parse_record(self, row):
+        cow = self.cows.get(row['number'])
+        if cow is None:
+            raise serializers.ValidationError('등록되지 않은 개체번호입니다.')
+        if not row['content']:
+            raise serializers.ValidationError('내용이 없습니다.')
+        return Record(cow_id=cow, content=row['content'], etc=row['etc'] or None,
+                      day=self.parse_date(row['day'], required=True), user=self.user)
+
+    @staticmethod
+    def parse_date(value, required):
+        if not value and not required:
+            return None
+        try:
+            date = parse_date(value)
+        except ValueError:
+            date = None
+        if date is None:
+            raise serializers.ValidationError('날짜는 YYYY-MM-DD 형식이어야 합니다.')
+        return date
@@ -0,0 +1,66 @@
+from collections import defaultdict
+
+from django.db.models import Max
+
+from cowapp.caching import get_cache
+from cowapp.models import Cow
+
+
+class LineageIndex:
+    """
+    Adjacency index of the mother-offspring links among the cows not deleted of a user.
+
+    The index is cached per the greatest 'seq' of the cows of the user, which changes whenever any cow
+    of the user is created, updated or deleted, but not when the records change.
+    So getting the index costs a single indexed query unless the cows have changed.
+    """
+    cache_timeout = 60 * 60 * 24
+
+    def __init__(self, rows):
+        ids = {number: pk for pk, number, _ in rows}
+        self.mothers = {pk: ids.get(mother_number) for pk, _, mother_number in rows}
+        self.children = defaultdict(list)
+        for pk, mother in self.mothers.items():
+            if mother is not None:
+                self.children[mother].append(pk)
+
+    @classmethod
+    def get(cls, user_id):
+        seq = Cow.all_objects.filter(user_id=user_id).aggregate(seq=Max('seq'))['seq']
+        key = f'cowapp:lineage:{user_id}:{seq}'
+        cache = get_cache()
+        index = cache.get(key)
+        if index is None:
+            rows = Cow.objects.filter(user_id=user_id).order_by().values_list('id', 'number', 'mother_number')
+            index = cls(list(rows))
+            cache.set(key, index, cls.cache_timeout)
+        return index
+
+    def ancestors(self, pk, depth):
+        """
+        Return the list of (id, generation) of the mother, grandmother and so on of the cow up to 'depth' generations.
+        """
+        result = []
+        visited = {pk}
+        for generation in range(1, depth + 1):
+            pk = self.mothers.get(pk)
+            if pk is None or pk in visited:
+                break
+            visited.add(pk)
+            result.append((pk, generation))
+        return result
+
+    def descendants(self, pk, depth):
+        """
+        Return the list of (id, generation) of the offspring of the cow up to 'depth' generations, breadth-first.
+        """
+        result = []
+        visited = {pk}
+        level = [pk]
+        for generation in range(1, depth + 1):
+            level = [child for mother in level for child in self.children.get(mother, ()) if child not in visited]
+            if not level:
+                break
+            visited.update(level)
+            result.extend((child, generation) for child in level)
+        return result
@@ -0,0 +1,195 @@
+import itertools
+import json
+import math
+import platform
+import time
+from collections import Counter, namedtuple
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from cowapp.benchmark import cow_number, seed_farms
+from cowapp.caching import get_cache
+from cowapp.models import Cow, Record, HerdVersion
+
+# 'path' and 'data' are functions of the index of the request, 'auth' is one of 'user', 'admin' and None.
+# The data is sent as JSON, or as multipart if it has a file.
+Scenario = namedtuple('Scenario', ('name', 'method', 'path', 'data', 'auth'))
+
+BENCHMARK_CACHE = 'cowapp-benchmark'
+PASSWORD = 'benchmark-password'
+
+
+def percentile(values, percent):
+    """
+    Return the 'percent' percentile of the sorted 'values' by the nearest-rank method.
+    """
+    return values[max(math.ceil(len(values) * percent / 100) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic farms and drive every endpoint of the API through the test client, ' \
+           'reporting the latency percentiles, the queries per request and the throughput of each as JSON. ' \
+           'Every change is rolled back at the end, and the responses are cached in a separate local cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=3)
+        parser.add_argument('--cows', type=int, default=500, help='cows per user')
+        parser.add_argument('--records', type=int, default=20, help='records per cow')
+        parser.add_argument('--depth', type=int, default=10, help='generations per lineage')
+        parser.add_argument('--requests', type=int, default=20, help='requests per endpoint')
+        parser.add_argument('--cold', action='store_true', help='clear the response cache before every request')
+        parser.add_argument('--output', help='file to write the results to, instead of stdout')
+
+    def handle(self, *args, **options):
+        caches = dict(settings.CACHES, **{BENCHMARK_CACHE: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': BENCHMARK_CACHE,
+        }})
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], CACHES=caches,
+                               COWAPP_RESPONSE_CACHE=BENCHMARK_CACHE), transaction.atomic():
+            self.stderr.write('Seeding {users} users x {cows} cows x {records} records...'.format(**options))
+            user = seed_farms(options['users'], options['cows'], options['records'], depth=options['depth'])[0]
+            user.set_password(PASSWORD)
+            user.save()
+            admin = User.objects.create(username='bench-admin', is_staff=True)
+            self.tokens = dict(user=user.auth_token.key, admin=admin.auth_token.key)
+
+            results = [self.run(scenario, options) for scenario in self.get_scenarios(user, options)]
+            transaction.set_rollback(True)
+            get_cache().clear()
+
+        report = json.dumps(dict(
+            config={key: options[key] for key in ('users', 'cows', 'records', 'depth', 'requests', 'cold')},
+            environment=dict(python=platform.python_version(), django=django.get_version(), database=connection.vendor),
+            results=results,
+        ), indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(report)
+            for result in results:
+                self.stdout.write('{name:40} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms  p99 {p99:8.2f} ms  '
+                                  '{queries:6.1f} queries  {throughput:8.1f} req/s'.format(**result))
+        else:
+            self.stdout.write(report)
+
+    def get_scenarios(self, user, options):
+        numbers = itertools.count(options['cows'])
+        cows = list(Cow.objects.filter(user=user).order_by('pk').values_list('pk', flat=True))
+        cow = cows[min(options['depth'], len(cows)) - 1]
+        number = Cow.objects.values_list('number', flat=True).get(pk=cow)
+        record = Record.objects.filter(cow=cow).values_list('pk', flat=True).first()
+        # Cows and records deleted one per request.
+        doomed_cows = [Cow.objects.create(number=cow_number(0, next(numbers)), sex='female', user=user).pk
+                       for _ in range(options['requests'])]
+        doomed_records = [Record.objects.create(content='delete', day='2018-01-01', cow_id=cow, user=user).pk
+                          for _ in range(options['requests'])]
+
+        def new_cow(i):
+            return dict(number=cow_number(0, next(numbers)), sex='female', birthday='2018-01-01')
+
+        def new_record(i):
+            return dict(cow=cow, content='vaccine', day='2018-06-22')
+
+        def csv_file(name, rows):
+            lines = [','.join(row) for row in rows]
+            return dict(file=SimpleUploadedFile(f'{name}.csv', '\n'.join(lines).encode(), content_type='text/csv'))
+
+        # The changes made by the scenarios before /changes/ are read since this cursor.
+        cursor = HerdVersion.get(user.id).version
+
+        return [
+            Scenario('GET /users/', 'get', lambda i: '/users/', None, 'admin'),
+            Scenario('POST /users/new/', 'post', lambda i: '/users/new/',
+                     lambda i: dict(username=f'bench-new{i}', password=PASSWORD), None),
+            Scenario('GET /users/my/', 'get', lambda i: '/users/my/', None, 'user'),
+            Scenario('POST /users/auth-token/', 'post', lambda i: '/users/auth-token/',
+                     lambda i: dict(username=user.username, password=PASSWORD), None),
+            Scenario('GET /cache/stats/', 'get', lambda i: '/cache/stats/', None, 'admin'),
+            Scenario('GET /metrics/', 'get', lambda i: '/metrics/', None, 'admin'),
+            Scenario('GET /cows/', 'get', lambda i: '/cows/', None, 'user'),
+            Scenario('GET /cows/?page_size=100', 'get', lambda i: '/cows/?page_size=100', None, 'user'),
+            Scenario('GET /cows/?fields&format=columns', 'get',
+                     lambda i: '/cows/?fields=number,summary,birthday&format=columns', None, 'user'),
+            Scenario('GET /cows/?stream=1', 'get', lambda i: '/cows/?stream=1', None, 'user'),
+            Scenario('POST /cows/', 'post', lambda i: '/cows/', new_cow, 'user'),
+            Scenario('POST /cows/bulk/', 'post', lambda i: '/cows/bulk/',
+                     lambda i: [new_cow(i) for _ in range(10)], 'user'),
+            Scenario('POST /cows/import/', 'post', lambda i: '/cows/import/',
+                     lambda i: csv_file('cows', [('number', 'sex', 'birthday', 'mother_number'),
+                                                 *((new_cow(i)['number'], 'female', '2018-01-01', number)
+                                                   for _ in range(10))]), 'user'),
+            Scenario('GET /cows/export/', 'get', lambda i: '/cows/export/', None, 'user'),
+            Scenario('GET /cows/<pk>/', 'get', lambda i: f'/cows/{cow}/', None, 'user'),
+            Scenario('PATCH /cows/<pk>/', 'patch', lambda i: f'/cows/{cow}/',
+                     lambda i: dict(birthday=f'2011-01-{i % 28 + 1:02}'), 'user'),
+            Scenario('DELETE /cows/<pk>/', 'delete', lambda i: f'/cows/{doomed_cows[i]}/', None, 'user'),
+            Scenario('GET /cows/<pk>/lineage/', 'get',
+                     lambda i: f'/cows/{cow}/lineage/?depth={options["depth"]}', None, 'user'),
+            Scenario('GET /records/', 'get', lambda i: '/records/', None, 'user'),
+            Scenario('GET /records/?page_size=100', 'get', lambda i: '/records/?page_size=100', None, 'user'),
+            Scenario('GET /records/?stream=1', 'get', lambda i: '/records/?stream=1', None, 'user'),
+            Scenario('POST /records/', 'post', lambda i: '/records/', new_record, 'user'),
+            Scenario('POST /records/bulk/', 'post', lambda i: '/records/bulk/',
+                     lambda i: [new_record(i) for _ in range(10)], 'user'),
+            Scenario('POST /records/import/', 'post', lambda i: '/records/import/',
+                     lambda i: csv_file('records', [('number', 'day', 'content', 'etc'),
+                                                    *((number, '2018-06-22', 'vaccine', f'benchmark {i}')
+                                                      for _ in range(10))]), 'user'),
+            Scenario('GET /records/export/', 'get', lambda i: '/records/export/', None, 'user'),
+            Scenario('GET /records/search/', 'get', lambda i: '/records/search/?' + urlencode(dict(q='인공수정')),
+                     None, 'user'),
+            Scenario('GET /records/<pk>/', 'get', lambda i: f'/records/{record}/', None, 'user'),
+            Scenario('PATCH /records/<pk>/', 'patch', lambda i: f'/records/{record}/',
+                     lambda i: dict(etc=f'benchmark {i}'), 'user'),
+            Scenario('DELETE /records/<pk>/', 'delete', lambda i: f'/records/{doomed_records[i]}/', None, 'user'),
+            Scenario('GET /records/cow/<cow>/', 'get', lambda i: f'/records/cow/{cow}/', None, 'user'),
+            Scenario('GET /sync/', 'get', lambda i: '/sync/', None, 'user'),
+            Scenario('GET /changes/', 'get', lambda i: f'/changes/?since={cursor}&timeout=0', None, 'user'),
+            Scenario('GET /stats/', 'get', lambda i: '/stats/', None, 'user'),
+        ]
+
+    def run(self, scenario, options):
+        client = Client()
+        if scenario.auth:
+            client.defaults['HTTP_AUTHORIZATION'] = f'Token {self.tokens[scenario.auth]}'
+        timings, queries, statuses, hits = [], [], Counter(), 0
+        for i in range(options['requests']):
+            kwargs = {}
+            if scenario.data:
+                data = scenario.data(i)
+                if isinstance(data, dict) and any(hasattr(value, 'read') for value in data.values()):
+                    kwargs = dict(data=data)
+                else:
+                    kwargs = dict(data=json.dumps(data), content_type='application/json')
+            path = scenario.path(i)
+            if options['cold']:
+                get_cache().clear()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = getattr(client, scenario.method)(path, **kwargs)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(context.captured_queries))
+            statuses[response.status_code] += 1
+            hits += response.get('X-Cache') == 'HIT'
+        timings.sort()
+        return dict(
+            name=scenario.name,
+            requests=len(timings),
+            statuses={str(status): count for status, count in sorted(statuses.items())},
+            cache_hits=hits,
+            p50=round(percentile(timings, 50), 3),
+            p95=round(percentile(timings, 95), 3),
+            p99=round(percentile(timings, 99), 3),
+            queries=sum(queries) / len(queries),
+            throughput=round(len(timings) / sum(timings) * 1000, 1),
+        )
@@ -0,0 +1,85 @@
+import statistics
+import time
+from importlib import import_module
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from cowapp.benchmark import seed_farms
+from cowapp.models import Cow, Record
+
+# The partial indexes on the cows not deleted are created by the migration, as Django of this version supports none.
+soft_delete = import_module('cowapp.migrations.0010_soft_delete')
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic farms and report the query plans and latencies of the hot queries ' \
+           'without and with the indexes of the models and the partial indexes on the cows not deleted. ' \
+           'Every change is rolled back at the end.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=3)
+        parser.add_argument('--cows', type=int, default=500, help='cows per user')
+        parser.add_argument('--records', type=int, default=20, help='records per cow')
+        parser.add_argument('--repeat', type=int, default=20, help='executions per query')
+
+    def handle(self, *args, **options):
+        # SQLite can alter the schema inside the transaction only if foreign key checks are disabled beforehand.
+        with connection.constraint_checks_disabled(), transaction.atomic():
+            self.stdout.write('Seeding {users} users x {cows} cows x {records} records...'.format(**options))
+            user = seed_farms(options['users'], options['cows'], options['records'])[0]
+            cow = Cow.objects.filter(user=user).exclude(mother_number=None).first()
+            queries = [
+                ('cow list', Cow.objects.with_mother_id().filter(user=user)),
+                ('cows by mother', Cow.objects.filter(user=user, mother_number=cow.mother_number)),
+                ('live cows', Cow.objects.filter(user=user)),
+                ('record list', Record.objects.filter(user=user)),
+                ('records by day', Record.objects.filter(user=user, day__gte='2015-01-01')),
+                ('records of cow', Record.objects.filter(cow=cow)),
+            ]
+
+            self.drop_indexes()
+            before = self.measure(queries, options['repeat'])
+            self.create_indexes()
+            after = self.measure(queries, options['repeat'])
+
+            for (name, _), (plan_before, ms_before), (plan_after, ms_after) in zip(queries, before, after):
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(f'  before: {ms_before:8.3f} ms  {plan_before}')
+                self.stdout.write(f'  after:  {ms_after:8.3f} ms  {plan_after}')
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def indexes():
+        return [(model, index) for model in (Cow, Record) for index in model._meta.indexes]
+
+    def drop_indexes(self):
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for model, index in self.indexes():
+                schema_editor.remove_index(model, index)
+            soft_delete.drop_partial_indexes(None, schema_editor)
+
+    def create_indexes(self):
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for model, index in self.indexes():
+                schema_editor.add_index(model, index)
+            soft_delete.create_partial_indexes(None, schema_editor)
+
+    @staticmethod
+    def explain(queryset):
+        sql, params = queryset.query.sql_with_params()
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return ' | '.join(str(row[-1]) for row in cursor.fetchall())
+
+    def measure(self, queries, repeat):
+        results = []
+        for _, queryset in queries:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            results.append((self.explain(queryset), statistics.median(timings)))
+        return results
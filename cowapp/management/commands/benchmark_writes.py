@@ -0,0 +1,87 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+
+from cowapp.models import Cow, Record
+
+# Pragmas of SQLite connections as Django opens them by default, measured for comparison.
+SQLITE_DEFAULT_PRAGMAS = dict(journal_mode='DELETE', synchronous='FULL', busy_timeout=5000, mmap_size=0)
+
+
+class Command(BaseCommand):
+    help = 'Measure the throughput of the records written concurrently by threads, each of them as a different user, ' \
+           'on a temporary database created like the test database. ' \
+           'On SQLite, the default pragmas are measured as well as the configured ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=200, help='records written per thread')
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        modes = [('configured', settings_dict.get('PRAGMAS', {}))]
+        path = None
+        if connection.vendor == 'sqlite':
+            modes.insert(0, ('default', SQLITE_DEFAULT_PRAGMAS))
+            # Threads cannot share an in-memory database.
+            path = os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+            settings_dict['TEST'] = dict(settings_dict.get('TEST') or {}, NAME=path)
+        pragmas = settings_dict.get('PRAGMAS')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = []
+            for name, mode_pragmas in modes:
+                settings_dict['PRAGMAS'] = mode_pragmas
+                connection.close()
+                results.append(dict(self.measure(options['threads'], options['writes']), mode=name))
+        finally:
+            settings_dict['PRAGMAS'] = pragmas
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if path:
+                shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+        self.stdout.write(json.dumps(dict(
+            config=dict(threads=options['threads'], writes=options['writes'], database=connection.vendor),
+            results=results,
+        ), indent=2))
+
+    def measure(self, threads, writes):
+        before = Record.objects.count()
+        cows = []
+        for i in range(threads):
+            user, _ = User.objects.get_or_create(username=f'bench-writer{i}')
+            cow, _ = Cow.objects.get_or_create(number=f'002-0000-{i:04}-1', sex='female', user=user)
+            cows.append(cow)
+        connection.close()
+        errors = []
+
+        def write(cow):
+            try:
+                for i in range(writes):
+                    try:
+                        Record.objects.create(cow=cow, user_id=cow.user_id, content='vaccine', day='2018-06-22')
+                    except OperationalError:
+                        errors.append(i)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=write, args=(cow,)) for cow in cows]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        written = Record.objects.count() - before
+        return dict(
+            seconds=round(elapsed, 3),
+            written=written,
+            errors=len(errors),
+            throughput=round(written / elapsed, 1),
+        )
@@ -0,0 +1,58 @@
+import json
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+
+from cowapp.importer import COLUMNS, HerdImporter
+
+
+class Command(BaseCommand):
+    help = 'Import the cows or the records of a user from a CSV file, in batches of short transactions. ' \
+           'The progress is saved to the checkpoint file after every batch, ' \
+           'so running the same command again resumes an interrupted import. Import the cows before their records.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('kind', choices=list(COLUMNS))
+        parser.add_argument('path', help='CSV file with the header ' + ' / '.join(
+            f'{kind}: {",".join(columns)}' for kind, columns in COLUMNS.items()))
+        parser.add_argument('--batch-size', type=int, default=1000, help='rows inserted per transaction')
+        parser.add_argument('--checkpoint', help='checkpoint file, by default the CSV file suffixed by .checkpoint')
+        parser.add_argument('--encoding', default='utf-8-sig')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get_by_natural_key(options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["username"]}')
+        checkpoint = options['checkpoint'] or options['path'] + '.checkpoint'
+        key = dict(user=user.id, kind=options['kind'], path=os.path.abspath(options['path']))
+        start = 0
+        if os.path.exists(checkpoint):
+            with open(checkpoint) as file:
+                saved = json.load(file)
+            if {name: saved.get(name) for name in key} == key:
+                start = saved['rows']
+                self.stdout.write(f'Resuming after {start} rows')
+
+        def progress(summary):
+            with open(checkpoint, 'w') as file:
+                json.dump(dict(key, rows=summary['rows']), file)
+            self.stdout.write('{rows} rows, {created} created, {skipped} skipped'.format(**summary))
+
+        importer = HerdImporter(user, options['kind'], batch_size=options['batch_size'], progress=progress)
+        try:
+            with open(options['path'], encoding=options['encoding'], newline='') as file:
+                summary = importer.run(file, start=start)
+        except serializers.ValidationError as e:
+            raise CommandError(e.detail[0])
+        for error in summary['errors']:
+            self.stderr.write('line {line}: {error}'.format(**error))
+        if summary.get('unresolved_mothers'):
+            self.stdout.write(f'Mothers not found: {", ".join(summary["unresolved_mothers"])}')
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            'Imported {created} of {rows} rows, {skipped} skipped'.format(**summary)))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cowapp.models import Cow, Record, purging_cows
+
+
+class Command(BaseCommand):
+    help = 'Delete the cows flagged as deleted, with their records, in bounded batches. ' \
+           'Each batch is a short transaction, so concurrent writers are not blocked for long.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='rows deleted per transaction')
+        parser.add_argument('--sleep', type=float, default=0, help='seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        cows = records = 0
+        while True:
+            cow_ids = list(Cow.all_objects.filter(deleted=True).order_by().values_list('pk', flat=True)[:batch_size])
+            if not cow_ids:
+                break
+            purging_cows.update(cow_ids)
+            try:
+                while True:
+                    record_ids = list(Record.objects.filter(cow__in=cow_ids).order_by()
+                                      .values_list('pk', flat=True)[:batch_size])
+                    if not record_ids:
+                        break
+                    with transaction.atomic():
+                        records += Record.objects.filter(pk__in=record_ids).delete()[0]
+                    time.sleep(options['sleep'])
+                with transaction.atomic():
+                    cows += Cow.all_objects.filter(pk__in=cow_ids, deleted=True).delete()[1].get(Cow._meta.label, 0)
+            finally:
+                purging_cows.difference_update(cow_ids)
+            self.stdout.write(f'Purged {cows} cows and {records} records')
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {cows} cows and {records} records in total'))
@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('cowapp.metrics')
+
+# Upper bounds in milliseconds of the buckets of the latency histograms, the last one catching the rest.
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+
+class RequestMetrics:
+    """
+    Timings of a request, and the callable passed to 'execute_wrapper' timing its queries.
+
+    Times are in seconds. 'view' is the time in the view, queries included, and 'render' is the time rendering
+    the response after the view returned, which DRF does for its responses.
+    'wait' is the time the view waited for something else than queries, like changes to notify.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_start = self.view_end = self.end = None
+        self.queries = 0
+        self.db = 0
+        self.wait = 0
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.db += duration
+            self.slowest = sorted(self.slowest + [(duration, sql)], key=lambda query: -query[0])[:3]
+            if duration * 1000 >= getattr(settings, 'COWAPP_SLOW_QUERY_MS', 100):
+                logger.warning('Slow query %.1f ms: %s', duration * 1000, sql)
+
+    @property
+    def total(self):
+        return self.end - self.start
+
+    @property
+    def view(self):
+        if self.view_start is None:
+            return 0
+        return (self.view_end or self.end) - self.view_start
+
+    @property
+    def render(self):
+        return self.end - self.view_end if self.view_end else 0
+
+    def get_server_timing(self):
+        timings = [
+            f'total;dur={self.total * 1000:.1f}',
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'view;dur={self.view * 1000:.1f}',
+            f'app;dur={max(self.view - self.db - self.wait, 0) * 1000:.1f};desc="view without queries"',
+            f'render;dur={self.render * 1000:.1f}',
+        ]
+        if self.wait:
+            timings.append(f'wait;dur={self.wait * 1000:.1f}')
+        return ', '.join(timings)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process aggregate of RequestMetrics per view, with a histogram of the total latencies.
+    """
+
+    def __init__(self):
+        self.views = OrderedDict()
+        self.lock = threading.Lock()
+
+    def add(self, name, metrics):
+        total = metrics.total * 1000
+        with self.lock:
+            entry = self.views.get(name)
+            if entry is None:
+                entry = self.views[name] = dict(count=0, total_ms=0, db_ms=0, queries=0, view_ms=0, render_ms=0,
+                                                max_ms=0, buckets=[0] * len(LATENCY_BUCKETS))
+            entry['count'] += 1
+            entry['total_ms'] += total
+            entry['db_ms'] += metrics.db * 1000
+            entry['queries'] += metrics.queries
+            entry['view_ms'] += metrics.view * 1000
+            entry['render_ms'] += metrics.render * 1000
+            entry['max_ms'] = max(entry['max_ms'], total)
+            entry['buckets'][next(i for i, bound in enumerate(LATENCY_BUCKETS) if total <= bound)] += 1
+
+    def snapshot(self):
+        with self.lock:
+            views = [(name, dict(entry, buckets=list(entry['buckets']))) for name, entry in self.views.items()]
+        return OrderedDict((name, OrderedDict([
+            ('count', entry['count']),
+            ('mean_ms', round(entry['total_ms'] / entry['count'], 3)),
+            ('max_ms', round(entry['max_ms'], 3)),
+            ('mean_queries', round(entry['queries'] / entry['count'], 2)),
+            ('mean_db_ms', round(entry['db_ms'] / entry['count'], 3)),
+            ('mean_view_ms', round(entry['view_ms'] / entry['count'], 3)),
+            ('mean_render_ms', round(entry['render_ms'] / entry['count'], 3)),
+            ('histogram', OrderedDict((str(bound), count) for bound, count in zip(LATENCY_BUCKETS, entry['buckets']))),
+        ])) for name, entry in sorted(views))
+
+    def clear(self):
+        with self.lock:
+            self.views.clear()
+
+
+metrics_registry = MetricsRegistry()
+
+
+class PerformanceMiddleware:
+    """
+    Middleware measuring the wall time, the queries and their time, and the time in the view and rendering of each
+    request, which are sent in the 'Server-Timing' header and aggregated per view in 'metrics_registry'.
+
+    Requests slower than 'COWAPP_SLOW_REQUEST_MS' in settings are logged with their slowest queries,
+    and so are queries slower than 'COWAPP_SLOW_QUERY_MS'. The body of streamed responses is not measured,
+    and neither is the 'wait' of the requests waiting for changes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = request.cowapp_metrics = RequestMetrics()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        metrics.end = time.perf_counter()
+
+        name = self.get_view_name(request)
+        response['Server-Timing'] = metrics.get_server_timing()
+        metrics_registry.add(name, metrics)
+        if (metrics.total - metrics.wait) * 1000 >= getattr(settings, 'COWAPP_SLOW_REQUEST_MS', 1000):
+            logger.warning('Slow request %s %s: %.1f ms, %d queries in %.1f ms, slowest: %s',
+                           name, request.get_full_path(), metrics.total * 1000, metrics.queries, metrics.db * 1000,
+                           ' | '.join(f'{duration * 1000:.1f} ms {sql}' for duration, sql in metrics.slowest))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.cowapp_metrics.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        request.cowapp_metrics.view_end = time.perf_counter()
+        return response
+
+    @staticmethod
+    def get_view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return f'{request.method} <unresolved>'
+        view = getattr(match.func, 'view_class', match.func)
+        return f'{request.method} {view.__name__}'
@@ -0,0 +1,33 @@
+# Generated by Django 2.0.13 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cowapp', '0005_remove_cow_mother'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cow',
+            index=models.Index(fields=['user', 'birthday', 'created'], name='cow_user_birthday_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cow',
+            index=models.Index(fields=['user', 'mother_number'], name='cow_user_mother_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cow',
+            index=models.Index(fields=['user', 'deleted'], name='cow_user_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['user', 'day', 'created'], name='record_user_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['cow', 'day'], name='record_cow_day_idx'),
+        ),
+    ]
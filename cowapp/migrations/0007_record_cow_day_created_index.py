@@ -0,0 +1,21 @@
+# Generated by Django 2.0.13 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cowapp', '0006_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='record',
+            name='record_cow_day_idx',
+        ),
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['cow', 'day', 'created'], name='record_cow_day_created_idx'),
+        ),
+    ]
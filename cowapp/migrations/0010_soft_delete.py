@@ -0,0 +1,46 @@
+# Generated by Django 2.0.13 on 2026-10-18 06:27
+
+from django.db import migrations
+
+PARTIAL_INDEXES = [
+    ('cow_live_user_number_uniq', 'UNIQUE', ('user_id', 'number')),
+    ('cow_live_user_birthday_idx', '', ('user_id', 'birthday', 'created')),
+]
+
+
+def create_partial_indexes(apps, schema_editor):
+    quote_name = schema_editor.quote_name
+    condition = ''
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        condition = f' WHERE {quote_name("deleted")} = {schema_editor.quote_value(False)}'
+    for name, unique, columns in PARTIAL_INDEXES:
+        schema_editor.execute('CREATE {} INDEX {} ON {} ({}){}'.format(
+            unique, quote_name(name), quote_name('cowapp_cow'), ', '.join(map(quote_name, columns)), condition,
+        ))
+
+
+def drop_partial_indexes(apps, schema_editor):
+    for name, _, _ in PARTIAL_INDEXES:
+        schema_editor.execute(f'DROP INDEX {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cowapp', '0009_change_sequence'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='cow',
+            unique_together=set(),
+        ),
+        migrations.RemoveIndex(
+            model_name='cow',
+            name='cow_user_birthday_idx',
+        ),
+        # Django of this version supports no partial index, and SQLite drops the indexes not in the state of the
+        # model whenever it remakes the table, so these should be created again after such a migration on the cow.
+        # 'manage.py check --tag database' reports them if they are missing.
+        migrations.RunPython(create_partial_indexes, drop_partial_indexes),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations, transaction
+from django.db.utils import OperationalError
+
+# Full-text index of the records on SQLite, kept in sync by the triggers even for bulk writes.
+# The trigram tokenizer(SQLite 3.34+) matches any substring of 3 or more characters, which suits Korean.
+# Like the partial indexes of the migration 0010, these should be created again after SQLite remakes the table,
+# and 'manage.py check --tag database' reports the triggers if they are missing.
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE cowapp_record_fts USING fts5("
+    "content, etc, content='cowapp_record', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER cowapp_record_fts_insert AFTER INSERT ON cowapp_record BEGIN "
+    "INSERT INTO cowapp_record_fts(rowid, content, etc) VALUES (new.id, new.content, new.etc); END",
+    "CREATE TRIGGER cowapp_record_fts_delete AFTER DELETE ON cowapp_record BEGIN "
+    "INSERT INTO cowapp_record_fts(cowapp_record_fts, rowid, content, etc) "
+    "VALUES ('delete', old.id, old.content, old.etc); END",
+    "CREATE TRIGGER cowapp_record_fts_update AFTER UPDATE OF content, etc ON cowapp_record BEGIN "
+    "INSERT INTO cowapp_record_fts(cowapp_record_fts, rowid, content, etc) "
+    "VALUES ('delete', old.id, old.content, old.etc); "
+    "INSERT INTO cowapp_record_fts(rowid, content, etc) VALUES (new.id, new.content, new.etc); END",
+    "INSERT INTO cowapp_record_fts(cowapp_record_fts) VALUES ('rebuild')",
+]
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS cowapp_record_fts_insert",
+    "DROP TRIGGER IF EXISTS cowapp_record_fts_delete",
+    "DROP TRIGGER IF EXISTS cowapp_record_fts_update",
+    "DROP TABLE IF EXISTS cowapp_record_fts",
+]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            for sql in CREATE_SQL:
+                schema_editor.execute(sql)
+    except OperationalError:
+        # FTS5 or the trigram tokenizer is not available, so searching falls back to LIKE.
+        pass
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cowapp', '0010_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.0.13 on 2026-10-18 07:07
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cowapp', '0011_record_fts'),
+    ]
+
+    operations = [
+        # The queries of the cows not deleted are served by the partial indexes of the migration 0010,
+        # and the changes of all the cows of a user, read by /sync/, by the index on the user and 'seq'.
+        migrations.RemoveIndex(
+            model_name='cow',
+            name='cow_user_deleted_idx',
+        ),
+    ]
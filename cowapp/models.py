@@ -1,9 +1,15 @@
+from contextlib import contextmanager
+
 from django.conf import settings
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
 from rest_framework.authtoken.models import Token
 
+from cowapp.authentication import token_cache
+
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
@@ -11,7 +17,58 @@ def create_auth_token(sender, instance=None, created=False, **kwargs):
         Token.objects.create(user=instance)
 
 
-class Cow(models.Model):
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def discard_cached_tokens(sender, instance=None, created=False, **kwargs):
+    if not created:
+        token_cache.discard_user(instance.id)
+
+
+@receiver(post_delete, sender=Token)
+def discard_cached_token(sender, instance=None, **kwargs):
+    token_cache.discard(instance.key)
+
+
+class CowQuerySet(models.QuerySet):
+    def with_mother_id(self):
+        """
+        Annotate each cow with 'mother_pk', the id of the cow of the same user whose number is 'mother_number'.
+
+        Resolving mothers in the same query keeps listing cows at a constant number of queries.
+        """
+        mothers = Cow.objects.filter(user=models.OuterRef('user'), number=models.OuterRef('mother_number'))
+        return self.annotate(mother_pk=models.Subquery(mothers.order_by().values('id')[:1]))
+
+
+class CowManager(models.Manager.from_queryset(CowQuerySet)):
+    """
+    Manager of the cows not deleted, whose queries are served by the partial indexes on them.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted=False)
+
+
+class HerdModel(models.Model):
+    """
+    Abstract model of the herd data of a user, stamped with the next HerdVersion of the user on every save.
+
+    Stamping and saving are done in the same transaction, so any object whose 'seq' is not greater than
+    a HerdVersion is visible once the HerdVersion is, which makes 'seq' a cursor of the changes of the user.
+    """
+    seq = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is not None:
+            update_fields = set(update_fields) | {'seq'}
+        with transaction.atomic(savepoint=False):
+            self.seq = HerdVersion.next(self.user_id)
+            super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class Cow(HerdModel):
     created = models.DateTimeField(auto_now_add=True)
     number = models.CharField(max_length=20)
     sex = models.TextField()
@@ -20,19 +77,31 @@ class Cow(models.Model):
     user = models.ForeignKey('auth.User', related_name='cows', on_delete=models.CASCADE)
     deleted = models.BooleanField(default=False)
 
+    objects = CowManager()
+    all_objects = CowQuerySet.as_manager()
+
     class Meta:
+        # The numbers of the cows not deleted are unique per user, and they are ordered,
+        # by the partial indexes on them created in the migration 0010.
         ordering = ('birthday', 'created',)
-        unique_together = ('user', 'number')
+        indexes = [
+            models.Index(fields=['user', 'mother_number'], name='cow_user_mother_idx'),
+            models.Index(fields=['user', 'seq'], name='cow_user_seq_idx'),
+        ]
 
     @property
     def summary(self):
-        return f'{self.number.split("-")[2]}{"♂" if self.sex=="male" else "♀"}'
+        return self.get_summary(self.number, self.sex)
+
+    @staticmethod
+    def get_summary(number, sex):
+        return f'{number.split("-")[2]}{"♂" if sex=="male" else "♀"}'
 
     def __str__(self):
         return self.number
 
 
-class Record(models.Model):
+class Record(HerdModel):
     created = models.DateTimeField(auto_now_add=True)
     cow = models.ForeignKey('cowapp.Cow', related_name='records', on_delete=models.CASCADE)
     content = models.TextField()
@@ -42,6 +111,129 @@ class Record(models.Model):
 
     class Meta:
         ordering = ('day', 'created',)
+        indexes = [
+            models.Index(fields=['user', 'day', 'created'], name='record_user_day_idx'),
+            models.Index(fields=['cow', 'day', 'created'], name='record_cow_day_created_idx'),
+            models.Index(fields=['user', 'seq'], name='record_user_seq_idx'),
+        ]
 
     def __str__(self):
         return "{}: {}".format(self.cow.number, self.content)
+
+
+class HerdVersion(models.Model):
+    """
+    Version of the cows and records of a user, increased whenever any of them is saved or deleted.
+    """
+    user = models.OneToOneField('auth.User', related_name='herd_version', on_delete=models.CASCADE,
+                                primary_key=True)
+    version = models.BigIntegerField(default=0)
+    modified = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def get(cls, user_id):
+        return cls.objects.get_or_create(user_id=user_id)[0]
+
+    @classmethod
+    def next(cls, user_id):
+        """
+        Increase the version of the user and return it.
+
+        The row stays locked until the end of the transaction, so the versions are visible in the order of them.
+        """
+        with transaction.atomic(savepoint=False):
+            versions = cls.objects.filter(user_id=user_id)
+            if not versions.update(version=models.F('version') + 1, modified=timezone.now()):
+                cls.objects.get_or_create(user_id=user_id)
+                versions.update(version=models.F('version') + 1, modified=timezone.now())
+            return versions.values_list('version', flat=True).get()
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted cow or record, stamped with the HerdVersion of the deletion like the 'seq' of HerdModel.
+    """
+    user = models.ForeignKey('auth.User', related_name='tombstones', on_delete=models.CASCADE)
+    model = models.CharField(max_length=20)
+    object_id = models.IntegerField()
+    seq = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'seq'], name='tombstone_user_seq_idx'),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Number of the rows of a CSV file, identified by its SHA-256 digest, imported for the user as 'kind',
+    saved with every batch of the import so that uploading the same file again resumes an interrupted import.
+    """
+    user = models.ForeignKey('auth.User', related_name='import_checkpoints', on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10)
+    digest = models.CharField(max_length=64)
+    rows = models.IntegerField(default=0)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'kind', 'digest')
+
+
+def with_herd_counts(users):
+    """
+    Annotate the queryset of 'users' with 'cow_count' and 'record_count', the numbers of the cows not deleted and
+    their records of each user.
+
+    The counts are correlated subqueries served by the indexes on the user, which unlike counting the joined cows and
+    records do not multiply the rows of one by the other.
+    """
+    cows = Cow.objects.filter(user=models.OuterRef('pk')).order_by().values('user')
+    records = Record.objects.filter(user=models.OuterRef('pk'), cow__deleted=False).order_by().values('user')
+    return users.annotate(
+        cow_count=Coalesce(models.Subquery(cows.annotate(count=models.Count('pk')).values('count'),
+                                           output_field=models.IntegerField()), 0),
+        record_count=Coalesce(models.Subquery(records.annotate(count=models.Count('pk')).values('count'),
+                                              output_field=models.IntegerField()), 0),
+    )
+
+
+# Ids of the users being deleted by 'deleting_user', whose cascaded cows and records need no Tombstone.
+deleting_users = set()
+# Ids of the deleted cows being purged, whose records need no Tombstone as the cows have one.
+purging_cows = set()
+# Model names and ids of the objects deleted in bulk, whose Tombstones are created in bulk with a single HerdVersion.
+bulk_deleting = set()
+
+
+@contextmanager
+def deleting_user(user_id):
+    """
+    Mark the user as being deleted within the block deleting the user, so that the cascaded deletes of the cows and
+    records of the user create no Tombstone.
+
+    The mark is removed when the block exits, even if the delete fails,
+    so the tombstones and notifications of a user whose delete was rolled back are not skipped afterwards.
+    """
+    deleting_users.add(user_id)
+    try:
+        yield
+    finally:
+        deleting_users.discard(user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_herd_version(sender, instance=None, created=False, **kwargs):
+    if created:
+        HerdVersion.objects.create(user=instance)
+
+
+@receiver(post_delete, sender=Cow)
+@receiver(post_delete, sender=Record)
+def create_tombstone(sender, instance=None, **kwargs):
+    if instance.user_id in deleting_users or getattr(instance, 'cow_id', None) in purging_cows or \
+            (sender._meta.model_name, instance.pk) in bulk_deleting:
+        return
+    with transaction.atomic(savepoint=False):
+        seq = HerdVersion.next(instance.user_id)
+        Tombstone.objects.create(user_id=instance.user_id, model=sender._meta.model_name, object_id=instance.pk,
+                                 seq=seq)
@@ -0,0 +1,138 @@
+"""
+Notifications of the changes of the cows and records of a user, for clients to wait for them instead of polling.
+
+The changes are read from the database by their 'seq', like the changes served by /sync/, so no change is lost
+whatever the broker. The broker named by 'COWAPP_CHANGE_BROKER' in settings only wakes the requests waiting for
+the changes of a user: LocalBroker is fed by the saves and deletes committed in the same process,
+and DatabaseBroker polls the HerdVersion of the user, which sees the changes of every worker process.
+A broker on a shared pub/sub implements the same 'get_token', 'wait' and 'publish'.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from cowapp.models import Cow, Record, HerdVersion, Tombstone, deleting_users
+
+
+class LocalBroker:
+    """
+    Broker within the process, whose waiters are woken by the changes published in the same process.
+
+    With several worker processes, a waiter sees the changes made by the other processes only when its wait times out,
+    so those setups should use DatabaseBroker or a broker on a shared pub/sub.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.tokens = {}
+
+    def get_token(self, user_id):
+        with self.condition:
+            return self.tokens.get(user_id, 0)
+
+    def wait(self, user_id, token, timeout):
+        """
+        Wait at most 'timeout' seconds for a change published since 'token', and return whether there was any.
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: self.tokens.get(user_id, 0) != token, timeout)
+
+    def publish(self, user_id):
+        with self.condition:
+            self.tokens[user_id] = self.tokens.get(user_id, 0) + 1
+            self.condition.notify_all()
+
+
+class DatabaseBroker:
+    """
+    Broker polling the HerdVersion of the user every 'interval' seconds, which sees the changes of every process
+    at the cost of a query by primary key per interval and waiter.
+    """
+    interval = 1
+
+    def get_token(self, user_id):
+        return HerdVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first()
+
+    def wait(self, user_id, token, timeout):
+        deadline = time.monotonic() + timeout
+        while self.get_token(user_id) == token:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining))
+        return True
+
+    def publish(self, user_id):
+        pass
+
+
+@lru_cache(maxsize=None)
+def load_broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    return load_broker(getattr(settings, 'COWAPP_CHANGE_BROKER', 'cowapp.notifications.LocalBroker'))
+
+
+def publish_change(user_id):
+    """
+    Publish a change of the cows or records of the user to the broker once the transaction is committed.
+
+    The saves and deletes are published by the receivers below, and the writes which do not send the model signals,
+    like 'bulk_create' and 'bulk_update', call this themselves.
+    """
+    transaction.on_commit(lambda: get_broker().publish(user_id))
+
+
+@receiver(post_save, sender=Cow)
+@receiver(post_save, sender=Record)
+@receiver(post_delete, sender=Cow)
+@receiver(post_delete, sender=Record)
+def notify_change(sender, instance=None, **kwargs):
+    if instance.user_id not in deleting_users:
+        publish_change(instance.user_id)
+
+
+def get_changes(user_id, since, limit=1000):
+    """
+    Return the HerdVersion of the user as the new cursor, and the changes since the cursor 'since' ordered by 'seq',
+    each of them the 'model', 'id' and 'action', 'saved' or 'deleted', of a cow or record.
+
+    If there are more than 'limit' changes, None is returned instead of them, for the client to fetch the changes
+    by /sync/ since the same cursor.
+    """
+    cursor = HerdVersion.get(user_id).version
+    changes = dict(user_id=user_id, seq__gt=since, seq__lte=cursor)
+    cows = Cow.all_objects.filter(**changes).order_by().values_list('seq', 'id', 'deleted')[:limit + 1]
+    records = Record.objects.filter(cow__deleted=False, **changes).order_by().values_list('seq', 'id')[:limit + 1]
+    tombstones = Tombstone.objects.filter(**changes).order_by().values_list('seq', 'model', 'object_id')[:limit + 1]
+    rows = [(seq, 'cow', pk, 'deleted' if deleted else 'saved') for seq, pk, deleted in cows]
+    rows += [(seq, 'record', pk, 'saved') for seq, pk in records]
+    rows += [(seq, model, pk, 'deleted') for seq, model, pk in tombstones]
+    if len(rows) > limit:
+        return cursor, None
+    return cursor, [OrderedDict([('seq', seq), ('model', model), ('id', pk), ('action', action)])
+                    for seq, model, pk, action in sorted(rows)]
+
+
+def wait_for_changes(user_id, since, timeout):
+    """
+    Return 'get_changes' as soon as there is any change since the cursor 'since', or after 'timeout' seconds.
+    """
+    broker = get_broker()
+    deadline = time.monotonic() + timeout
+    while True:
+        # The token is taken before reading, so a change committed after the read ends the wait.
+        token = broker.get_token(user_id)
+        cursor, events = get_changes(user_id, since)
+        remaining = deadline - time.monotonic()
+        if events != [] or remaining <= 0 or not broker.wait(user_id, token, remaining):
+            return cursor, events
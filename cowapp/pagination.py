@@ -0,0 +1,155 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def positive_int(value, strict=False, cutoff=None):
+    """
+    Parse the query parameter 'value' as a non-negative integer, or a positive one if 'strict',
+    at most 'cutoff' if given. Raise ValueError if it is not.
+    """
+    value = int(value)
+    if value < 0 or (strict and value == 0):
+        raise ValueError(value)
+    return min(value, cutoff) if cutoff is not None else value
+
+
+def get_keyset_filter(ordering, values):
+    """
+    Return the Q object selecting the rows ordered after 'values' on 'ordering', the fields prefixed by '-' if
+    descending, where null precedes any value in ascending order and follows any value in descending order.
+    The last field of 'ordering' is unique and not null, like 'pk'.
+    """
+    field, value = ordering[0].lstrip('-'), values[0]
+    descending = ordering[0].startswith('-')
+    if value is None:
+        after = None if descending else Q(**{field + '__isnull': False})
+        equal = Q(**{field + '__isnull': True})
+    else:
+        after = Q(**{field + '__lt': value}) | Q(**{field + '__isnull': True}) if descending else \
+            Q(**{field + '__gt': value})
+        equal = Q(**{field: value})
+    if len(ordering) == 1:
+        return after
+    rest = Q(get_keyset_filter(ordering[1:], values[1:]), equal)
+    if value is not None and not descending:
+        # Implied by the rest, but a range on the first field lets the database seek the index instead of scanning.
+        return Q(after | rest, **{field + '__gte': value})
+    return rest if after is None else after | rest
+
+
+def iterate_keyset(queryset, fields, chunk_size):
+    """
+    Yield the values of 'fields' of the rows of the queryset in its ordering, in lists of at most 'chunk_size' rows.
+
+    Every chunk is a query of its own, after the last row of the previous chunk on the ordering with 'pk'
+    as tie-breaker, so at most a chunk of rows is held in memory even where the database driver fetches all the rows
+    of a query at once, as SQLite does.
+    """
+    ordering = tuple(field for field in queryset.query.order_by or queryset.model._meta.ordering
+                     if isinstance(field, str)) + ('pk',)
+    if connections[queryset.db].features.nulls_order_largest:
+        queryset = queryset.order_by(*[F(field[1:]).desc(nulls_last=True) if field.startswith('-') else
+                                       F(field).asc(nulls_first=True) for field in ordering])
+    else:
+        # Null is already the smallest value, and the ordering by the fields themselves can be served by an index.
+        queryset = queryset.order_by(*ordering)
+    keys = [field.lstrip('-') for field in ordering]
+    position = None
+    while True:
+        chunk = queryset if position is None else queryset.filter(get_keyset_filter(ordering, position))
+        rows = list(chunk.values_list(*fields, *keys)[:chunk_size])
+        if rows:
+            yield [row[:len(fields)] for row in rows]
+        if len(rows) < chunk_size:
+            return
+        position = rows[-1][len(fields):]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset(cursor) pagination on the default ordering of the model('Meta.ordering'), with 'pk' as tie-breaker.
+
+    Pagination is opt-in unless 'optional' is False:
+    the response is paginated only if the request has 'page_size' or 'cursor' in query_params.
+    The cursor encodes the ordering values of the last object of the previous page,
+    so fetching a page costs the same range scan however deep the page is.
+    Paginated responses are always ordered by the default ordering, thus 'order_by' would be ignored.
+    Null values are ordered first, as SQLite does.
+    """
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    default_page_size = 100
+    max_page_size = 1000
+    invalid_cursor_message = '유효하지 않은 cursor 입니다.'
+    optional = True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.optional and self.page_size_query_param not in request.query_params and \
+                self.cursor_query_param not in request.query_params:
+            return None
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(queryset.model._meta.ordering) + ('pk',)
+
+        queryset = queryset.order_by(*[F(field).asc(nulls_first=True) for field in self.ordering])
+        position = self.decode_cursor(request)
+        if position is not None:
+            try:
+                queryset = queryset.filter(get_keyset_filter(self.ordering, position))
+            except (ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_page_size(self, request):
+        try:
+            return positive_int(request.query_params[self.page_size_query_param], strict=True,
+                                cutoff=self.max_page_size)
+        except (KeyError, ValueError):
+            return self.default_page_size
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = [getattr(self.page[-1], field) for field in self.ordering]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position))
+
+    def encode_cursor(self, position):
+        position = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+
+class UserPagination(KeysetPagination):
+    optional = False
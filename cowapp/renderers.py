@@ -0,0 +1,122 @@
+import codecs
+import csv
+from collections import OrderedDict
+from io import StringIO
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer rendering by orjson, if installed, with the same output as JSONRenderer.
+
+    The values orjson does not know, and the dates and times which JSONRenderer formats differently,
+    are passed to the JSONEncoder of DRF. Indented or ASCII-only output is left to JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact or \
+                self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=JSONEncoder().default,
+                           option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    """
+    JSONRenderer rendering lists of objects as arrays of the columns, requested by 'format=columns' in query_params.
+
+    A list is rendered as {"count": 2, "columns": {"id": [1, 2], "number": ["...", "..."]}},
+    which drops the keys repeated in every object. The 'results' of paginated responses are rendered likewise,
+    and any other data is rendered as JSONRenderer does. Streamed responses are not affected.
+    """
+    media_type = 'application/vnd.cowapp.columns+json'
+    format = 'columns'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(self.to_columns(data), accepted_media_type, renderer_context)
+
+    @classmethod
+    def to_columns(cls, data):
+        if isinstance(data, list) and all(isinstance(item, dict) for item in data):
+            keys = OrderedDict.fromkeys(key for item in data for key in item)
+            return OrderedDict([
+                ('count', len(data)),
+                ('columns', OrderedDict((key, [item.get(key) for item in data]) for key in keys)),
+            ])
+        if isinstance(data, dict) and isinstance(data.get('results'), list):
+            return OrderedDict(data, results=cls.to_columns(data['results']))
+        return data
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Renderer of lists of objects as CSV rows, in the 'columns' of renderer_context or the keys of the first object.
+
+    The header, preceded by the UTF-8 BOM for spreadsheets to detect the encoding, is rendered unless 'header' in
+    renderer_context is false, so that a stream can be rendered chunk by chunk. Any other data, like errors,
+    is rendered as a single row.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        rows = data if isinstance(data, list) and all(isinstance(item, dict) for item in data) else \
+            [data if isinstance(data, dict) else dict(detail=data)]
+        columns = renderer_context.get('columns') or (list(rows[0]) if rows else [])
+        buffer = StringIO()
+        writer = csv.DictWriter(buffer, columns, extrasaction='ignore')
+        header = renderer_context.get('header', True)
+        if header:
+            writer.writeheader()
+        writer.writerows(rows)
+        ret = buffer.getvalue().encode(self.charset)
+        return codecs.BOM_UTF8 + ret if header else ret
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renderer of lists of objects as newline delimited JSON, an object per line as rendered by FastJSONRenderer,
+    so that a stream can be rendered chunk by chunk. Any other data is rendered as a single line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer = FastJSONRenderer()
+        return b''.join(renderer.render(item) + b'\n' for item in (data if isinstance(data, list) else [data]))
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Renderer of data as a server-sent event, named by 'event' and identified by 'id' in renderer_context,
+    whose data is rendered by FastJSONRenderer, so that a stream can be rendered event by event.
+    Error responses are rendered as 'error' events.
+    """
+    media_type = 'text/event-stream'
+    format = 'events'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        response = renderer_context.get('response')
+        event = 'error' if getattr(response, 'exception', False) else renderer_context.get('event', 'message')
+        lines = [f'event: {event}']
+        if 'id' in renderer_context:
+            lines.append(f'id: {renderer_context["id"]}')
+        lines.append('data: ' + FastJSONRenderer().render(data).decode())
+        return ('\n'.join(lines) + '\n\n').encode()
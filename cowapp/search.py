@@ -0,0 +1,56 @@
+from django.db import connections, router
+from django.db.models import Q
+
+from cowapp.models import Record
+
+FTS_TABLE = 'cowapp_record_fts'
+# Triggers keeping the full-text index in sync with the records, created by the migration 0011.
+FTS_TRIGGERS = ('cowapp_record_fts_insert', 'cowapp_record_fts_delete', 'cowapp_record_fts_update')
+FTS_MIN_LENGTH = 3
+
+
+def has_fts(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def like_pattern(term):
+    return '%{}%'.format(term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_'))
+
+
+def search_records(user, query, offset=0, limit=20):
+    """
+    Return the ids of the records of the user matching every term of 'query' in 'content' or 'etc'.
+
+    If the database has the full-text index, the terms of at least FTS_MIN_LENGTH characters, which the trigram
+    tokenizer requires, are matched on it and the ids are ranked by BM25, and the shorter terms are matched with LIKE
+    on those candidates only. If every term is shorter, or there is no index, the records are scanned with LIKE
+    newest first, along the index on the user and 'day', which stops once the page is filled.
+    Records of the deleted cows are excluded.
+    """
+    terms = query.split()
+    if not terms:
+        return []
+    connection = connections[router.db_for_read(Record)]
+    long_terms = [term for term in terms if len(term) >= FTS_MIN_LENGTH]
+    short_terms = [term for term in terms if len(term) < FTS_MIN_LENGTH]
+    if long_terms and has_fts(connection):
+        match = ' '.join('"{}"'.format(term.replace('"', '""')) for term in long_terms)
+        like = ''.join(" AND (r.content LIKE %s ESCAPE '\\' OR r.etc LIKE %s ESCAPE '\\')" for _ in short_terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT r.id FROM {FTS_TABLE} f '
+                f'JOIN cowapp_record r ON r.id = f.rowid JOIN cowapp_cow c ON c.id = r.cow_id '
+                f'WHERE {FTS_TABLE} MATCH %s AND r.user_id = %s AND c.deleted = %s{like} '
+                f'ORDER BY f.rank LIMIT %s OFFSET %s',
+                [match, user.id, False, *(like_pattern(term) for term in short_terms for _ in range(2)),
+                 limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+    records = Record.objects.filter(user=user, cow__deleted=False)
+    for term in terms:
+        records = records.filter(Q(content__icontains=term) | Q(etc__icontains=term))
+    return list(records.order_by('-day', '-created').values_list('id', flat=True)[offset:offset + limit])
@@ -1,3 +1,5 @@
+from collections import OrderedDict, defaultdict
+
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
@@ -7,11 +9,62 @@ from rest_framework import serializers
 from cowapp.models import Cow, Record
 
 
+def validate_cow_number(num):
+    if len(num) == 15:
+        arr = num.split('-')
+        if len(arr) == 4:
+            if len(arr[0]) == 3 and len(arr[1]) == len(arr[2]) == 4 and len(arr[3]) == 1:
+                if all([y.isdigit() for x in arr for y in x]):
+                    return num
+    raise serializers.ValidationError("개체번호의 패턴이 유효하지 않습니다.")
+
+
 class UserSerializer(serializers.ModelSerializer):
+    """
+    Serializer of the profile of a user, with the numbers of the cows and records of the user.
+
+    The ids of all of them are serialized only if requested by 'cows' or 'records' in 'expand' of query_params.
+    Like the counts, the records of the deleted cows are left out, and they are read from 'live_records'
+    if prefetched there.
+    """
+    cow_count = serializers.SerializerMethodField()
+    record_count = serializers.SerializerMethodField()
+    records = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ('id', 'username', 'password', 'cows', 'records', 'auth_token')
+        fields = ('id', 'username', 'password', 'cow_count', 'record_count', 'cows', 'records', 'auth_token')
         read_only_fields = ('cows', 'records', 'auth_token')
+        extra_kwargs = dict(password=dict(write_only=True))
+
+    @staticmethod
+    def get_expanded_fields(request):
+        if request is None:
+            return set()
+        return {name.strip() for name in request.query_params.get('expand', '').split(',')}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expanded = self.get_expanded_fields(self.context.get('request'))
+        for name in ('cows', 'records'):
+            if name not in expanded:
+                del fields[name]
+        return fields
+
+    def get_cow_count(self, instance):
+        if hasattr(instance, 'cow_count'):
+            return instance.cow_count
+        return Cow.objects.filter(user=instance).count()
+
+    def get_record_count(self, instance):
+        if hasattr(instance, 'record_count'):
+            return instance.record_count
+        return Record.objects.filter(user=instance, cow__deleted=False).count()
+
+    def get_records(self, instance):
+        if hasattr(instance, 'live_records'):
+            return [record.pk for record in instance.live_records]
+        return list(Record.objects.filter(user=instance, cow__deleted=False).values_list('pk', flat=True))
 
     def validate(self, data):
         if 'password' not in data:
@@ -25,46 +78,223 @@ class UserSerializer(serializers.ModelSerializer):
         return data
 
 
-class RecordSerializer(serializers.ModelSerializer):
+class CowRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField looking up the cows preloaded in context['cows'], if any, instead of querying one by one.
+    """
+
+    def to_internal_value(self, data):
+        cows = self.context.get('cows')
+        if cows is None:
+            return super().to_internal_value(data)
+        try:
+            return cows[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin serializing only the fields in 'fields' of query_params, comma separated,
+    plus the nested ones in 'expand', on GET requests. Without 'fields', every field is serialized.
+
+    Only the top-level serializer is trimmed, so nested serializers keep every field.
+    'field_sources' maps the fields which are not fields of the model to the model fields they read,
+    so that 'trim_queryset' can load only the columns and the relations needed.
+    """
+    field_sources = {}
+
+    @classmethod
+    def get_requested_fields(cls, request):
+        if request is None or request.method != 'GET' or 'fields' not in request.query_params:
+            return None
+        names = request.query_params['fields'].split(',') + request.query_params.get('expand', '').split(',')
+        return {name.strip() for name in names if name.strip()} | {'id'}
+
+    @classmethod
+    def trim_queryset(cls, queryset, fields):
+        """
+        Return 'queryset' loading only the columns of 'fields', and joining and prefetching only the relations of them.
+        """
+        model = queryset.model
+        columns = {'pk', *(field.lstrip('-') for field in model._meta.ordering)}
+        for name, field in cls().fields.items():
+            if name not in fields:
+                continue
+            if name in cls.field_sources:
+                columns.update(cls.field_sources[name])
+            elif any(f.name == field.source and f.concrete for f in model._meta.get_fields()):
+                columns.add(field.source)
+        related = {column.split('__')[0] for column in columns if '__' in column}
+        columns.update(related)
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        prefetches = [lookup for lookup in queryset._prefetch_related_lookups if lookup.split('__')[0] in fields]
+        return queryset.prefetch_related(None).prefetch_related(*prefetches).only(*columns)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        root = self.parent.parent if isinstance(self.parent, serializers.ListSerializer) else self.parent
+        requested = self.get_requested_fields(self.context.get('request')) if root is None else None
+        if requested is None:
+            return fields
+        return OrderedDict((name, field) for name, field in fields.items() if name in requested)
+
+
+class RecordSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    cow = CowRelatedField(queryset=Cow.objects.all())
     cow_summary = serializers.ReadOnlyField(source='cow.summary')
     cow_number = serializers.ReadOnlyField(source='cow.number')
+    field_sources = dict(
+        cow_summary=('cow__number', 'cow__sex'),
+        cow_number=('cow__number',),
+    )
 
     class Meta:
         model = Record
-        exclude = ('user',)
+        exclude = ('user', 'seq')
 
     def validate_cow(self, cow):
-        if cow.user != self.context['request'].user:
+        if cow.user_id != self.context['request'].user.id:
             raise serializers.ValidationError('소유 중인 개체에 대해서만 이력을 등록할 수 있습니다.')
         return cow
 
 
-class CowSerializer(serializers.ModelSerializer):
+class CowSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     sex = serializers.ChoiceField(choices=[('female', 'female'), ('male', 'male')])
     records = RecordSerializer(many=True, read_only=True)
     summary = serializers.ReadOnlyField()
     mother_id = serializers.SerializerMethodField()
+    field_sources = dict(
+        # The nested records read the summary of the cow.
+        records=('number', 'sex'),
+        summary=('number', 'sex'),
+        mother_id=('user', 'mother_number'),
+    )
 
     class Meta:
         model = Cow
-        exclude = ('user',)
+        exclude = ('user', 'seq')
 
     def get_mother_id(self, instance):
-        mother = Cow.objects.filter(user=instance.user, number=instance.mother_number).first()
+        if hasattr(instance, 'mother_pk'):
+            return instance.mother_pk
+        mother = Cow.objects.filter(user_id=instance.user_id, number=instance.mother_number).first()
         if mother:
             return mother.id
         return None
 
+    def update(self, instance, validated_data):
+        instance = super().update(instance, validated_data)
+        instance.__dict__.pop('mother_pk', None)
+        return instance
+
     def validate_number(self, num):
-        if len(num) == 15:
-            arr = num.split('-')
-            if len(arr) == 4:
-                if len(arr[0]) == 3 and len(arr[1]) == len(arr[2]) == 4 and len(arr[3]) == 1:
-                    if all([y.isdigit() for x in arr for y in x]):
-                        return num
-        raise serializers.ValidationError("개체번호의 패턴이 유효하지 않습니다.")
+        return validate_cow_number(num)
 
     def validate_mother_number(self, num):
         if not num:
             return num
         return self.validate_number(num)
+
+
+class FlatCowSerializer(CowSerializer):
+    """
+    CowSerializer without the nested records, for the responses listing the records separately.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        del fields['records']
+        return fields
+
+
+class ValuesListSerializer:
+    """
+    Read-only serializer of a queryset building the same representations as 'serializer_class' with many=True,
+    from the rows of 'values()' instead of the model instances.
+
+    The model fields are copied as they are, except those which DRF formats, like dates, formatted by the fields
+    of 'serializer_class'. Any other field is built by the method 'get_<field name>' from the row,
+    for which 'field_sources' lists the values needed. The fields are trimmed as 'serializer_class' does.
+    """
+    serializer_class = None
+    field_sources = {}
+    plain_fields = (serializers.BooleanField, serializers.CharField, serializers.ChoiceField,
+                    serializers.IntegerField, serializers.PrimaryKeyRelatedField)
+
+    def __init__(self, queryset, context=None):
+        self.queryset = queryset
+        self.context = context or {}
+        self.fields = self.serializer_class(context=self.context).fields
+
+    @property
+    def data(self):
+        opts = self.queryset.model._meta
+        columns = {'id'}
+        getters = []
+        for name, field in self.fields.items():
+            if name in self.field_sources:
+                columns.update(self.field_sources[name])
+                getters.append((name, getattr(self, f'get_{name}')))
+                continue
+            column = opts.get_field(field.source).attname
+            columns.add(column)
+            if isinstance(field, self.plain_fields):
+                getters.append((name, lambda row, column=column: row[column]))
+            else:
+                getters.append((name, lambda row, column=column, field=field:
+                                None if row[column] is None else field.to_representation(row[column])))
+        rows = list(self.queryset.prefetch_related(None).values(*columns))
+        self.prepare(rows)
+        return [OrderedDict((name, getter(row)) for name, getter in getters) for row in rows]
+
+    def prepare(self, rows):
+        """
+        Load whatever the 'get_<field name>' methods need for 'rows' at once.
+        """
+
+
+class RecordValuesSerializer(ValuesListSerializer):
+    serializer_class = RecordSerializer
+    field_sources = dict(
+        cow_summary=('cow__number', 'cow__sex'),
+        cow_number=('cow__number',),
+    )
+
+    def get_cow_summary(self, row):
+        return Cow.get_summary(row['cow__number'], row['cow__sex'])
+
+    def get_cow_number(self, row):
+        return row['cow__number']
+
+
+class CowValuesSerializer(ValuesListSerializer):
+    """
+    ValuesListSerializer of CowSerializer, whose queryset should be annotated by 'with_mother_id'.
+    """
+    serializer_class = CowSerializer
+    field_sources = dict(
+        records=(),
+        summary=('number', 'sex'),
+        mother_id=('mother_pk',),
+    )
+
+    def prepare(self, rows):
+        self.records = defaultdict(list)
+        if 'records' in self.fields:
+            records = Record.objects.filter(cow__in=self.queryset.values('pk'))
+            for record in RecordValuesSerializer(records).data:
+                self.records[record['cow']].append(record)
+
+    def get_records(self, row):
+        return self.records[row['id']]
+
+    def get_summary(self, row):
+        return Cow.get_summary(row['number'], row['sex'])
+
+    def get_mother_id(self, row):
+        return row['mother_pk']
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+
+from django.db.models import Count
+from django.db.models.functions import TruncMonth, TruncYear
+from django.utils import timezone
+
+from cowapp.models import Cow, Record
+
+AGE_BUCKETS = ((0, '0'), (1, '1'), (2, '2'), (3, '3-4'), (5, '5-9'), (10, '10+'))
+
+
+def get_age_bucket(age):
+    label = AGE_BUCKETS[0][1]
+    for start, bucket in AGE_BUCKETS:
+        if age >= start:
+            label = bucket
+    return label
+
+
+def get_herd_stats(user, top=10):
+    """
+    Return the statistics of the cows not deleted and their records of the user, aggregated by grouped queries.
+
+    Ages are counted in years from the year of birth, and cows without birthday are counted as 'unknown'.
+    """
+    cows = Cow.objects.filter(user=user).order_by()
+    records = Record.objects.filter(user=user, cow__deleted=False).order_by()
+
+    sexes = OrderedDict((row['sex'], row['count']) for row in
+                        cows.values('sex').annotate(count=Count('id')).order_by('sex'))
+    this_year = timezone.localdate().year
+    ages = OrderedDict((label, 0) for _, label in AGE_BUCKETS)
+    # Truncating null dates fails on SQLite, so the cows without birthday are the rest of them.
+    years = cows.filter(birthday__isnull=False).annotate(year=TruncYear('birthday'))
+    for row in years.values('year').annotate(count=Count('id')):
+        ages[get_age_bucket(this_year - row['year'].year)] += row['count']
+    ages['unknown'] = sum(sexes.values()) - sum(ages.values())
+    months = records.annotate(month=TruncMonth('day')).values('month').annotate(count=Count('id')).order_by('month')
+    contents = records.values('content').annotate(count=Count('id')).order_by('-count', 'content')[:top]
+
+    return OrderedDict([
+        ('cows', sum(sexes.values())),
+        ('records', sum(row['count'] for row in months)),
+        ('sexes', sexes),
+        ('ages', ages),
+        ('records_per_month', [OrderedDict([('month', row['month'].strftime('%Y-%m')), ('count', row['count'])])
+                               for row in months]),
+        ('top_contents', [OrderedDict([('content', row['content']), ('count', row['count'])]) for row in contents]),
+    ])
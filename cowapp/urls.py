@@ -10,12 +10,27 @@ urlpatterns = [
     path('users/my/', views.UserDetail.as_view()),
     path('users/auth-token/', views.UserAuthToken.as_view()),
 
+    path('cache/stats/', views.ResponseCacheStats.as_view()),
+    path('metrics/', views.Metrics.as_view()),
+
     path('cows/', views.CowList.as_view()),
+    path('cows/bulk/', views.CowBulk.as_view()),
+    path('cows/import/', views.HerdImport.as_view(kind='cows')),
+    path('cows/export/', views.CowExport.as_view()),
     path('cows/<int:pk>/', views.CowDetail.as_view()),
+    path('cows/<int:pk>/lineage/', views.CowLineage.as_view()),
 
     path('records/', views.RecordList.as_view()),
+    path('records/bulk/', views.RecordBulk.as_view()),
+    path('records/import/', views.HerdImport.as_view(kind='records')),
+    path('records/export/', views.RecordExport.as_view()),
+    path('records/search/', views.RecordSearch.as_view()),
     path('records/<int:pk>/', views.RecordDetail.as_view()),
     path('records/cow/<int:cow>/', views.RecordList.as_view()),
+
+    path('sync/', views.Sync.as_view()),
+    path('changes/', views.Changes.as_view()),
+    path('stats/', views.Stats.as_view()),
 ]
 
 urlpatterns = format_suffix_patterns(urlpatterns)
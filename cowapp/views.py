@@ -1,15 +1,37 @@
+import codecs
+import hashlib
+import time
+from collections import OrderedDict
+
 from django.contrib.auth.models import User
-from django.core.exceptions import FieldError, ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, QuerySet
+from django.http import StreamingHttpResponse
 from rest_framework import generics, exceptions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from rest_framework.status import HTTP_201_CREATED
+from rest_framework.status import HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
 
-from cowapp.models import Cow, Record
+from cowapp.bulk import bulk_create, bulk_update
+from cowapp.caching import ConditionalGetMixin, ResponseCacheMixin, response_cache_stats
+from cowapp.filters import FilterSchema
+from cowapp.importer import COLUMNS, HerdImporter
+from cowapp.lineage import LineageIndex
+from cowapp.metrics import metrics_registry
+from cowapp.models import Cow, Record, HerdVersion, ImportCheckpoint, Tombstone, bulk_deleting, deleting_user, \
+    with_herd_counts
+from cowapp.notifications import publish_change, wait_for_changes
+from cowapp.pagination import KeysetPagination, UserPagination, iterate_keyset, positive_int
 from cowapp.permissions import IsOwner
-from cowapp.serializers import CowSerializer, RecordSerializer, UserSerializer
+from cowapp.renderers import FastJSONRenderer, CSVRenderer, NDJSONRenderer, EventStreamRenderer
+from cowapp.search import search_records
+from cowapp.serializers import CowSerializer, RecordSerializer, UserSerializer, FlatCowSerializer, \
+    CowValuesSerializer, RecordValuesSerializer
+from cowapp.stats import get_herd_stats
 
 
 class FilterOrderAPIView(generics.GenericAPIView):
@@ -18,35 +40,243 @@ class FilterOrderAPIView(generics.GenericAPIView):
 
     By extending this class, the APIView will automatically filter and order queryset
     if the request has query_params.
-    Keys of the query_params that is not valid for the function 'QuerySet.filter', except 'order_by', would be ignored.
-    The value of the key 'order_by' that is not valid for the function 'QuerySet.order_by' would be ignored.
+    Keys of the query_params that is not valid for the FilterSchema of the model, except 'order_by', would be ignored.
+    The value of the key 'order_by' that is not a field of the FilterSchema would be ignored.
+    """
+
+    def get_filter_schema(self):
+        return FilterSchema.for_model(self.queryset.model)
+
+    def filter_queryset(self, queryset):
+        schema = self.get_filter_schema()
+        queryset = schema.filter(queryset, self.request.query_params)
+        ordering = self.request.query_params.get('order_by')
+        if schema.is_orderable(ordering):
+            return queryset.order_by(ordering)
+        return queryset
+
+
+class SparseFieldsListMixin:
+    """
+    Custom supporting mixin for list APIViews to load only what the fields requested by 'fields' and 'expand'
+    in query_params need, as trimmed by the SparseFieldsMixin of the serializer.
     """
 
     def filter_queryset(self, queryset):
-        ordering = None
-        options = {}
-        for key, value in self.request.query_params.items():
-            if key == 'order_by' and value:
-                try:
-                    queryset.filter(**{value[value[0]=='-':]+'__isnull': 'True'})
-                    ordering = value
-                except (FieldError, ValueError, ValidationError):
-                    pass
-                continue
-            try:
-                queryset.filter(**{key: value})
-                options.update({key: value})
-            except (FieldError, ValueError, ValidationError):
-                pass
-        if ordering:
-            return queryset.filter(**options).order_by(ordering)
-        return queryset.filter(**options)
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        fields = serializer_class.get_requested_fields(self.request)
+        if fields is None:
+            return queryset
+        return serializer_class.trim_queryset(queryset, fields)
+
+
+class OwnedObjectMixin:
+    """
+    Custom supporting mixin for detail APIViews to look up the object among the objects of the user,
+    by 'pk' and 'user_id' in a single query, so that the objects of the other users are not found.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user_id=self.request.user.id)
+
+
+class StreamListMixin:
+    """
+    Custom supporting mixin for list APIViews to stream the response if the request has 'stream=1' in query_params.
+
+    The primary keys of the filtered queryset are read 'stream_chunk_size' at a time by keyset on its ordering,
+    and the objects of each chunk are loaded and serialized together,
+    so the memory of the worker is bounded regardless of the size of the result.
+    The streamed JSON array is the same as the response without pagination.
+    """
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('stream') not in ('1', 'true', 'True'):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(self.stream(queryset), content_type='application/json')
+
+    def stream(self, queryset):
+        renderer = FastJSONRenderer()
+        separator = b''
+        yield b'['
+        for chunk in self.stream_chunks(queryset):
+            for data in chunk:
+                yield separator + renderer.render(data)
+                separator = b','
+        yield b']'
+
+    def stream_chunks(self, queryset):
+        for rows in iterate_keyset(queryset, ('pk',), self.stream_chunk_size):
+            chunk = [pk for pk, in rows]
+            data = {item['id']: item for item in self.get_serializer(queryset.filter(pk__in=chunk), many=True).data}
+            yield [data[pk] for pk in chunk]
+
+
+class ValuesListMixin:
+    """
+    Custom supporting mixin for list APIViews to serialize querysets by 'values_serializer_class',
+    which builds the same representations from 'values()' rows without instantiating the models.
+
+    The serializer_class is still used for the pages of the paginated responses and for writing.
+    """
+    values_serializer_class = None
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many') and args and isinstance(args[0], QuerySet) and 'data' not in kwargs:
+            return self.values_serializer_class(args[0], context=self.get_serializer_context())
+        return super().get_serializer(*args, **kwargs)
+
+
+class ExportAPIView(FilterOrderAPIView):
+    """
+    Custom supporting APIView streaming the objects of the user, filtered and ordered like the list by query_params,
+    as CSV, or as NDJSON by 'format=ndjson' or the Accept header, in the columns of 'export_fields'.
+
+    'export_fields' maps the columns to the lookups read by 'values_list', 'export_chunk_size' rows at a time
+    by keyset on the ordering, and every chunk is rendered as soon as it is read,
+    so the memory of the worker is bounded regardless of the size of the export.
+    """
+    renderer_classes = (CSVRenderer, NDJSONRenderer)
+    export_fields = None
+    export_name = None
+    export_chunk_size = 2000
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        chunks = iterate_keyset(queryset, tuple(self.export_fields.values()), self.export_chunk_size)
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(self.stream(renderer, chunks),
+                                         content_type=f'{renderer.media_type}; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{self.export_name}.{renderer.format}"'
+        return response
+
+    def stream(self, renderer, chunks):
+        columns = list(self.export_fields)
+        context = dict(columns=columns, header=True)
+        yield renderer.render([], renderer_context=context)
+        context['header'] = False
+        for chunk in chunks:
+            yield renderer.render([OrderedDict(zip(columns, row)) for row in chunk], renderer_context=context)
+
+
+class BulkAPIView(generics.GenericAPIView):
+    """
+    Custom supporting APIView for creating, updating and deleting many objects of the user in a single request.
+
+    POST takes a list of objects to create, PATCH a list of objects with 'id' to update partially,
+    and DELETE a list of ids to delete.
+    Every item is validated before any of them is written.
+    If any of them is invalid, the response is 400 with the list of errors in the order of the items,
+    where the errors of the valid items are empty.
+    Otherwise all of them are written in a single transaction, stamped with the same HerdVersion.
+    """
+    max_batch_size = 1000
+
+    def get_items(self, request):
+        if not isinstance(request.data, list) or not all(isinstance(item, dict) for item in request.data):
+            raise exceptions.ValidationError(dict(non_field_errors=['객체의 목록이어야 합니다.']))
+        if len(request.data) > self.max_batch_size:
+            raise exceptions.ValidationError(dict(non_field_errors=[f'최대 {self.max_batch_size}개까지 가능합니다.']))
+        return request.data
+
+    def validate_items(self, serializers):
+        valid = [serializer.is_valid() for serializer in serializers]
+        errors = self.get_batch_errors(serializers) if all(valid) else [serializer.errors for serializer in serializers]
+        if any(errors):
+            raise exceptions.ValidationError(errors)
+
+    def get_batch_errors(self, serializers):
+        """
+        Return the list of errors of the items which are valid by themselves but not in the batch.
+        """
+        return [{} for _ in serializers]
+
+    def get_response_data(self, objects):
+        loaded = self.get_queryset().in_bulk([obj.pk for obj in objects])
+        return self.get_serializer([loaded[obj.pk] for obj in objects], many=True).data
+
+    def post(self, request, *args, **kwargs):
+        serializers = [self.get_serializer(data=item) for item in self.get_items(request)]
+        self.validate_items(serializers)
+        model = self.get_queryset().model
+        objects = [model(user=request.user, **serializer.validated_data) for serializer in serializers]
+        with transaction.atomic():
+            seq = HerdVersion.next(request.user.id)
+            for obj in objects:
+                obj.seq = seq
+            bulk_create(model, objects)
+            publish_change(request.user.id)
+        return Response(self.get_response_data(objects), status=HTTP_201_CREATED)
+
+    def patch(self, request, *args, **kwargs):
+        items = self.get_items(request)
+        instances = self.get_queryset().in_bulk([item['id'] for item in items if isinstance(item.get('id'), int)])
+        missing = [{} if instances.get(item.get('id')) else dict(id=['존재하지 않는 id 입니다.']) for item in items]
+        if any(missing):
+            raise exceptions.ValidationError(missing)
+        serializers = [self.get_serializer(instances[item['id']], data=item, partial=True) for item in items]
+        self.validate_items(serializers)
+        fields = {'seq'}
+        for serializer in serializers:
+            for field, value in serializer.validated_data.items():
+                setattr(serializer.instance, field, value)
+                fields.add(field)
+        objects = [serializer.instance for serializer in serializers]
+        with transaction.atomic():
+            seq = HerdVersion.next(request.user.id)
+            for obj in objects:
+                obj.seq = seq
+            bulk_update(self.get_queryset().model, objects, fields)
+            publish_change(request.user.id)
+        return Response(self.get_response_data(objects))
+
+    def delete(self, request, *args, **kwargs):
+        ids = request.data
+        if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+            raise exceptions.ValidationError(dict(non_field_errors=['id의 목록이어야 합니다.']))
+        queryset = self.get_queryset().filter(pk__in=ids)
+        found = set(queryset.values_list('pk', flat=True))
+        if len(found) != len(set(ids)):
+            raise exceptions.ValidationError([{} if pk in found else dict(id=['존재하지 않는 id 입니다.']) for pk in ids])
+        model_name = queryset.model._meta.model_name
+        keys = {(model_name, pk) for pk in found}
+        bulk_deleting.update(keys)
+        try:
+            with transaction.atomic():
+                seq = HerdVersion.next(request.user.id)
+                Tombstone.objects.bulk_create([
+                    Tombstone(user_id=request.user.id, model=model_name, object_id=pk, seq=seq) for pk in found
+                ])
+                queryset.delete()
+        finally:
+            bulk_deleting.difference_update(keys)
+        return Response(status=HTTP_204_NO_CONTENT)
+
+
+def get_profile(user_id):
+    return with_herd_counts(User.objects.select_related('auth_token')).get(pk=user_id)
 
 
 class UserList(generics.ListAPIView):
-    queryset = User.objects.all()
+    """
+    APIView listing the users, always paginated, with their counts annotated in the same query.
+    """
+    queryset = with_herd_counts(User.objects.select_related('auth_token'))
     serializer_class = UserSerializer
     permission_classes = (IsAdminUser,)
+    pagination_class = UserPagination
+
+    def get_queryset(self):
+        expanded = UserSerializer.get_expanded_fields(self.request)
+        lookups = dict(cows='cows', records=Prefetch('records', queryset=Record.objects.filter(cow__deleted=False),
+                                                     to_attr='live_records'))
+        return self.queryset.prefetch_related(*(lookup for name, lookup in lookups.items() if name in expanded))
 
 
 class UserCreate(generics.CreateAPIView):
@@ -61,7 +291,11 @@ class UserDetail(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return User.objects.get_by_natural_key(self.request.user.username)
+        return get_profile(self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        with deleting_user(instance.pk):
+            instance.delete()
 
 
 class UserAuthToken(ObtainAuthToken):
@@ -69,13 +303,33 @@ class UserAuthToken(ObtainAuthToken):
         serializer = self.serializer_class(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
-        return Response(UserSerializer(user).data)
+        return Response(UserSerializer(get_profile(user.pk), context={'request': request}).data)
 
 
-class CowList(FilterOrderAPIView, generics.ListCreateAPIView):
-    queryset = Cow.objects.all()
+class ResponseCacheStats(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(dict(response_cache_stats))
+
+
+class Metrics(APIView):
+    """
+    APIView of the request metrics of this process per view, as aggregated by the PerformanceMiddleware.
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(metrics_registry.snapshot())
+
+
+class CowList(ConditionalGetMixin, ResponseCacheMixin, StreamListMixin, ValuesListMixin, SparseFieldsListMixin,
+              FilterOrderAPIView, generics.ListCreateAPIView):
+    queryset = Cow.objects.with_mother_id().prefetch_related('records')
     serializer_class = CowSerializer
+    values_serializer_class = CowValuesSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return self.queryset.filter(user=self.request.user)
@@ -94,25 +348,338 @@ class CowList(FilterOrderAPIView, generics.ListCreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class CowDetail(generics.RetrieveUpdateDestroyAPIView):
+class CowBulk(BulkAPIView):
+    queryset = Cow.objects.with_mother_id().prefetch_related('records')
+    serializer_class = CowSerializer
+    permission_classes = (IsAuthenticated,)
+    http_method_names = ('post', 'options')
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+    def get_batch_errors(self, serializers):
+        numbers = [serializer.validated_data['number'] for serializer in serializers]
+        existing = set(self.get_queryset().filter(number__in=numbers).values_list('number', flat=True))
+        errors = []
+        for i, number in enumerate(numbers):
+            duplicated = number in existing or number in numbers[:i]
+            errors.append(dict(number=['이 번호를 가진 개체가 이미 있습니다.']) if duplicated else {})
+        return errors
+
+
+class CowExport(ExportAPIView):
+    """
+    APIView exporting the cows of the user in the columns read by the import, so that an export can be imported again.
+    """
     queryset = Cow.objects.all()
+    permission_classes = (IsAuthenticated,)
+    export_fields = OrderedDict((column, column) for column in COLUMNS['cows'])
+    export_name = 'cows'
+
+
+class CowDetail(ConditionalGetMixin, ResponseCacheMixin, OwnedObjectMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Cow.objects.with_mother_id().prefetch_related('records')
     serializer_class = CowSerializer
     permission_classes = (IsAuthenticated, IsOwner)
 
+    def perform_destroy(self, instance):
+        instance.deleted = True
+        instance.save(update_fields=['deleted'])
+
+
+class CowLineage(OwnedObjectMixin, generics.GenericAPIView):
+    """
+    APIView listing the ancestors and the descendants of the cow up to 'depth' generations.
+
+    Each relative is listed with its 'generation' from the cow, 1 for the mother and the children.
+    """
+    queryset = Cow.objects.with_mother_id()
+    serializer_class = FlatCowSerializer
+    permission_classes = (IsAuthenticated, IsOwner)
+    default_depth = 3
+    max_depth = 100
+
+    def get(self, request, *args, **kwargs):
+        cow = self.get_object()
+        depth = request.query_params.get('depth', '')
+        depth = min(int(depth), self.max_depth) if depth.isdigit() else self.default_depth
+        index = LineageIndex.get(request.user.id)
+        ancestors = index.ancestors(cow.pk, depth)
+        descendants = index.descendants(cow.pk, depth)
+        relatives = Cow.objects.with_mother_id().in_bulk([pk for pk, _ in ancestors + descendants])
+        return Response(OrderedDict([
+            ('cow', self.get_serializer(cow).data),
+            ('ancestors', self.serialize_relatives(relatives, ancestors)),
+            ('descendants', self.serialize_relatives(relatives, descendants)),
+        ]))
+
+    def serialize_relatives(self, relatives, generations):
+        generations = [(pk, generation) for pk, generation in generations if pk in relatives]
+        data = self.get_serializer([relatives[pk] for pk, _ in generations], many=True).data
+        return [OrderedDict(item, generation=generation) for item, (_, generation) in zip(data, generations)]
+
 
-class RecordList(FilterOrderAPIView, generics.ListCreateAPIView):
-    queryset = Record.objects.all()
+class RecordList(ConditionalGetMixin, ResponseCacheMixin, StreamListMixin, ValuesListMixin, SparseFieldsListMixin,
+                 FilterOrderAPIView, generics.ListCreateAPIView):
+    queryset = Record.objects.filter(cow__deleted=False).select_related('cow')
     serializer_class = RecordSerializer
+    values_serializer_class = RecordValuesSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+        if 'cow' in self.kwargs:
+            queryset = queryset.filter(cow=self.kwargs['cow'])
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        self.check_object()
+        return super().list(request, *args, **kwargs)
+
+    def check_object(self):
+        if 'cow' in self.kwargs and not Cow.objects.filter(pk=self.kwargs['cow'], user=self.request.user).exists():
+            raise exceptions.NotFound()
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class RecordDetail(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Record.objects.all()
+class RecordBulk(BulkAPIView):
+    queryset = Record.objects.filter(cow__deleted=False).select_related('cow')
+    serializer_class = RecordSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method in ('POST', 'PATCH') and isinstance(self.request.data, list):
+            if not hasattr(self, 'cows'):
+                ids = [item['cow'] for item in self.request.data if isinstance(item, dict) and 'cow' in item]
+                self.cows = Cow.objects.in_bulk([pk for pk in ids if str(pk).isdigit()])
+            context['cows'] = self.cows
+        return context
+
+
+class RecordExport(ExportAPIView):
+    """
+    APIView exporting the records of the user in the columns read by the import, the cow by its number.
+    """
+    queryset = Record.objects.filter(cow__deleted=False)
+    permission_classes = (IsAuthenticated,)
+    export_fields = OrderedDict([('number', 'cow__number'), ('day', 'day'), ('content', 'content'), ('etc', 'etc')])
+    export_name = 'records'
+
+
+class HerdImport(APIView):
+    """
+    APIView importing the cows or the records of the user, by 'kind', from the CSV file uploaded as 'file'.
+
+    The file is read as it is parsed and inserted in batches by HerdImporter, and the response is its summary.
+    The rows imported are saved with every batch in the ImportCheckpoint of the file, by its SHA-256 digest,
+    so an interrupted import is resumed by uploading the same file again, or from 'start' rows if given.
+    If the file turns out not to be UTF-8, the response has the 'rows' imported before the undecodable line.
+    """
+    permission_classes = (IsAuthenticated,)
+    parser_classes = (MultiPartParser,)
+    kind = None
+    batch_size = 1000
+
+    def post(self, request, *args, **kwargs):
+        file = request.data.get('file')
+        if not hasattr(file, 'read'):
+            raise exceptions.ValidationError(dict(file=['CSV 파일이 없습니다.']))
+        try:
+            start = positive_int(request.query_params['start']) if 'start' in request.query_params else None
+        except ValueError:
+            raise exceptions.ValidationError(dict(start=['start 가 올바르지 않습니다.']))
+        digest = hashlib.sha256()
+        for chunk in file.chunks():
+            digest.update(chunk)
+        file.seek(0)
+        checkpoint = ImportCheckpoint.objects.get_or_create(user=request.user, kind=self.kind,
+                                                            digest=digest.hexdigest())[0]
+
+        def progress(summary):
+            checkpoint.rows = summary['rows']
+            checkpoint.save(update_fields=['rows', 'modified'])
+
+        importer = HerdImporter(request.user, self.kind, batch_size=self.batch_size, progress=progress)
+        try:
+            summary = importer.run(codecs.iterdecode(file, 'utf-8-sig'),
+                                   start=checkpoint.rows if start is None else start)
+        except UnicodeDecodeError:
+            return Response(dict(file=['UTF-8 로 인코딩된 파일이어야 합니다.'], rows=importer.summary['rows']),
+                            status=HTTP_400_BAD_REQUEST)
+        checkpoint.delete()
+        return Response(summary)
+
+
+class RecordSearch(ConditionalGetMixin, ResponseCacheMixin, generics.ListAPIView):
+    """
+    APIView searching the records of the user whose 'content' or 'etc' contain every term of 'q', best match first.
+
+    The results are paginated by 'offset' and 'page_size', with the link to the next page as 'next'.
+    """
+    queryset = Record.objects.select_related('cow')
+    serializer_class = RecordSerializer
+    permission_classes = (IsAuthenticated,)
+    default_page_size = 20
+    max_page_size = 100
+
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        try:
+            offset = positive_int(params.get('offset', 0))
+            page_size = positive_int(params.get('page_size', self.default_page_size), strict=True,
+                                     cutoff=self.max_page_size)
+        except ValueError:
+            raise exceptions.ValidationError('offset 또는 page_size 가 올바르지 않습니다.')
+        ids = search_records(request.user, params.get('q', ''), offset, page_size + 1)
+        records = self.get_queryset().in_bulk(ids[:page_size])
+        data = self.get_serializer([records[pk] for pk in ids[:page_size] if pk in records], many=True).data
+        next_link = None
+        if len(ids) > page_size:
+            next_link = replace_query_param(request.build_absolute_uri(), 'offset', offset + page_size)
+        return Response(OrderedDict([
+            ('next', next_link),
+            ('results', data),
+        ]))
+
+
+class RecordDetail(ConditionalGetMixin, ResponseCacheMixin, OwnedObjectMixin,
+                   generics.RetrieveUpdateDestroyAPIView):
+    queryset = Record.objects.filter(cow__deleted=False).select_related('cow')
     serializer_class = RecordSerializer
     permission_classes = (IsAuthenticated, IsOwner)
+
+
+class Sync(APIView):
+    """
+    APIView for clients to fetch the changes of the cows and records of the user since the cursor 'since'.
+
+    The response has the new cursor, the cows and records saved since the cursor, and the ids of
+    the cows and records deleted since the cursor, including the cows flagged as 'deleted'.
+    The records of the deleted cows are not listed, as they are deleted with their cows for clients.
+    Cows are listed without the nested records. Without 'since', every cow and record is listed.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        since = request.query_params.get('since')
+        if since is not None and not since.isdigit():
+            raise exceptions.ValidationError(dict(since=['유효하지 않은 cursor 입니다.']))
+        cursor = HerdVersion.get(request.user.id).version
+        changes = dict(user=request.user, seq__lte=cursor)
+        if since is not None:
+            changes.update(seq__gt=int(since))
+
+        deleted = dict(cows=[], records=[])
+        for model, object_id in Tombstone.objects.filter(**changes).values_list('model', 'object_id'):
+            deleted[model + 's'].append(object_id)
+        cows = []
+        for cow in Cow.all_objects.with_mother_id().filter(**changes):
+            if cow.deleted:
+                deleted['cows'].append(cow.id)
+            else:
+                cows.append(cow)
+        records = Record.objects.select_related('cow').filter(cow__deleted=False, **changes)
+        return Response(OrderedDict([
+            ('cursor', cursor),
+            ('cows', FlatCowSerializer(cows, many=True).data),
+            ('records', RecordSerializer(records, many=True).data),
+            ('deleted', deleted),
+        ]))
+
+
+class Changes(APIView):
+    """
+    APIView notifying the changes of the cows and records of the user since the cursor 'since',
+    for clients to refetch only what changed instead of polling the lists.
+
+    The response has the new cursor, the changes since the cursor as the 'seq', 'model', 'id' and 'action' of
+    the cows and records, and 'resync', which is true instead of the changes if they are too many to list,
+    for the client to fetch them by /sync/ since the same cursor. Without 'since', the changes start at the current
+    HerdVersion of the user.
+
+    By default, the request is a long poll answered as soon as there is any change, or after 'timeout' seconds
+    with no change. If the request accepts 'text/event-stream', the response is a stream of server-sent 'changes'
+    events with the same data and the cursor as the id, so that reconnecting by 'Last-Event-ID' resumes
+    the stream, which is closed after 'timeout' seconds. Comments are sent every 'heartbeat' seconds with no change.
+    """
+    permission_classes = (IsAuthenticated,)
+    renderer_classes = (FastJSONRenderer, EventStreamRenderer)
+    poll_timeout = 25
+    max_poll_timeout = 60
+    stream_timeout = 300
+    max_stream_timeout = 3600
+    heartbeat = 15
+
+    def get(self, request, *args, **kwargs):
+        stream = request.accepted_renderer.format == 'events'
+        since = request.query_params.get('since', request.META.get('HTTP_LAST_EVENT_ID') if stream else None)
+        if since is not None and not since.isdigit():
+            raise exceptions.ValidationError(dict(since=['유효하지 않은 cursor 입니다.']))
+        since = int(since) if since is not None else None
+        try:
+            timeout = positive_int(request.query_params.get('timeout', self.stream_timeout if stream else
+                                                            self.poll_timeout),
+                                   cutoff=self.max_stream_timeout if stream else self.max_poll_timeout)
+        except ValueError:
+            raise exceptions.ValidationError(dict(timeout=['timeout 이 올바르지 않습니다.']))
+        if stream:
+            response = StreamingHttpResponse(self.stream(request.user.id, since, timeout),
+                                             content_type='text/event-stream; charset=utf-8')
+            response['Cache-Control'] = 'no-cache'
+            return response
+        return Response(self.get_data(request, since, timeout))
+
+    def get_data(self, request, since, timeout):
+        if since is None:
+            cursor, events = HerdVersion.get(request.user.id).version, []
+        else:
+            metrics = getattr(request, 'cowapp_metrics', None)
+            start, db = time.perf_counter(), metrics.db if metrics else 0
+            cursor, events = wait_for_changes(request.user.id, since, timeout)
+            if metrics:
+                metrics.wait += max(time.perf_counter() - start - (metrics.db - db), 0)
+        return self.to_data(cursor, events)
+
+    def stream(self, user_id, since, timeout):
+        renderer = EventStreamRenderer()
+        deadline = time.monotonic() + timeout
+        wait = 0
+        while True:
+            if since is None:
+                cursor, events = HerdVersion.get(user_id).version, []
+            else:
+                cursor, events = wait_for_changes(user_id, since, wait)
+            if events != [] or since is None:
+                yield renderer.render(self.to_data(cursor, events), renderer_context=dict(event='changes', id=cursor))
+                since = cursor
+            elif wait:
+                yield b': heartbeat\n\n'
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            wait = min(self.heartbeat, remaining)
+
+    @staticmethod
+    def to_data(cursor, events):
+        return OrderedDict([
+            ('cursor', cursor),
+            ('events', events or []),
+            ('resync', events is None),
+        ])
+
+
+class Stats(ConditionalGetMixin, ResponseCacheMixin, generics.RetrieveAPIView):
+    """
+    APIView for the statistics of the cows and records of the user, cached until any of them changes.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(get_herd_stats(request.user))